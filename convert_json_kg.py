@@ -1,243 +1,550 @@
 import os
+import re
+import mmap
 import json
 import csv
+import operator
+import itertools
+import concurrent.futures
+from collections import deque
+from typing import Any, Iterable
 
-def process_pubmed_data(json_data):
+# This module type-checks under mypyc: `mypyc convert_json_kg.py` compiles it to
+# a C extension that `import convert_json_kg` picks up in place of this file;
+# run it with `python -c "import convert_json_kg; convert_json_kg.main()"`.
+
+# orjson is optional; fall back to the standard library when it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+# ijson is optional; without it the whole input file is parsed up front
+try:
+    import ijson  # type: ignore[import-untyped]
+except ImportError:
+    ijson = None  # type: ignore[assignment]
+
+# pysimdjson is optional; it parses files below STREAM_MIN_SIZE faster than streaming them
+try:
+    import simdjson
+except ImportError:
+    simdjson = None  # type: ignore[assignment]
+
+JSON_DECODE_ERRORS: tuple[type[Exception], ...] = (json.JSONDecodeError,)
+if ijson is not None:
+    JSON_DECODE_ERRORS += (ijson.JSONError,)
+
+# Input files of at least this size are streamed with ijson instead of parsed whole
+STREAM_MIN_SIZE = 1 << 30
+
+# Buffer size for the CSV exports, so millions of small rows reach the disk in few writes
+CSV_BUFFER_SIZE = 1 << 22
+
+# Translation tables used to normalise names into node IDs in a single pass
+AUTHOR_ID_TABLE = str.maketrans({' ': '_', '.': None})
+KEYWORD_ID_TABLE = str.maketrans({' ': '_', '/': '_'})
+SPACE_ID_TABLE = str.maketrans({' ': '_'})
+
+# Every column a Paper node can carry; 'nodeId' and 'pmid' are always exported
+PAPER_COLUMNS = ('nodeId', 'pmid', 'title', 'abstract', 'pubdate', 'year', 'doi', 'pages', 'issue', 'languages')
+# Optional Paper columns to export. Leaving out free-text fields such as 'pubdate'
+# (in favour of the integer 'year') or 'languages' shrinks the JSON and CSV output
+INCLUDE_FIELDS = {'title', 'abstract', 'pubdate', 'doi', 'pages', 'issue', 'languages'}
+# Picks the exported columns out of a full PAPER_COLUMNS tuple
+select_paper_columns = operator.itemgetter(
+    *(i for i, column in enumerate(PAPER_COLUMNS) if i < 2 or column in INCLUDE_FIELDS)
+)
+
+# References usually point at papers outside the input, which have no Paper node.
+# neo4j-admin import fails on relationships to missing nodes, so such CITES rows
+# are left out of the CSV export; set this to keep them, and then run the import
+# with --skip-bad-relationships
+KEEP_DANGLING_CITATIONS = False
+
+# Matches the first 4-digit year in free-form dates such as "1998 Dec-1999 Jan";
+# ASCII digits only, since \d also matches digits int() cannot parse
+YEAR_PATTERN = re.compile(r'[0-9]{4}')
+
+# Column order of each node type; nodes are stored as tuples in this order
+# and the same tuple doubles as the CSV header
+NODE_SCHEMAS = {
+    'Paper': select_paper_columns(PAPER_COLUMNS),
+    'Author': ('nodeId', 'name'),
+    'MeshTerm': ('nodeId', 'term', 'mesh_id'),
+    'PublicationType': ('nodeId', 'type', 'type_id'),
+    'Chemical': ('nodeId', 'name', 'chemical_id'),
+    'Keyword': ('nodeId', 'keyword'),
+    'Grant': ('nodeId', 'grant_id', 'grant_acronym', 'country', 'agency'),
+    'Journal': ('nodeId', 'name', 'nlm_unique_id', 'issn_linking', 'medline_ta'),
+    'Country': ('nodeId', 'name')
+}
+
+# Column order of each relationship type; relationships are stored as tuples
+REL_SCHEMAS = {
+    'WROTE': ('startNode', 'endNode'),
+    'HAS_MESH_TERM': ('startNode', 'endNode'),
+    'HAS_PUBLICATION_TYPE': ('startNode', 'endNode'),
+    'CONTAINS_CHEMICAL': ('startNode', 'endNode'),
+    'HAS_KEYWORD': ('startNode', 'endNode'),
+    'FUNDED_BY': ('startNode', 'endNode'),
+    'PUBLISHED_IN': ('startNode', 'endNode'),
+    'PUBLISHED_FROM': ('startNode', 'endNode'),
+    'CITES': ('startNode', 'endNode', 'citation_text')
+}
+
+# neo4j-admin import types of the non-string node columns
+CSV_COLUMN_TYPES = {'year': 'int'}
+
+# CSV headers in the neo4j-admin import format: nodes carry an ':ID' column and
+# a trailing ':LABEL', relationships lead with ':START_ID', ':END_ID', ':TYPE'
+NODE_CSV_HEADERS = {
+    node_type: ('nodeId:ID',)
+    + tuple(f'{column}:{CSV_COLUMN_TYPES[column]}' if column in CSV_COLUMN_TYPES else column for column in columns[1:])
+    + (':LABEL',)
+    for node_type, columns in NODE_SCHEMAS.items()
+}
+REL_CSV_HEADERS = {
+    rel_type: (':START_ID', ':END_ID', ':TYPE') + columns[2:]
+    for rel_type, columns in REL_SCHEMAS.items()
+}
+
+def iter_pubmed_articles(file):
+    """
+    Yields (pmid, paper_data) pairs from a PubMed JSON file opened in binary mode.
+    Files smaller than STREAM_MIN_SIZE are memory-mapped and parsed with simdjson
+    when it is installed. Otherwise papers are streamed one at a time with ijson
+    when it is installed, so the full input never has to be held in memory.
+
+    Args:
+        file: A binary file object containing a JSON object keyed by PMID.
     """
-    Processes a dictionary of PubMed JSON data into a structured knowledge graph
+    if simdjson is not None and os.fstat(file.fileno()).st_size < STREAM_MIN_SIZE:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            parser = simdjson.Parser()
+            try:
+                document = parser.parse(buffer)
+            except ValueError as e:
+                # pysimdjson reports malformed documents as a plain ValueError;
+                # only this call is narrowed, so other ValueErrors still surface
+                raise json.JSONDecodeError(str(e), '', 0) from e
+            # items() hands back each paper as a plain dict
+            yield from document.items()
+    elif ijson is not None:
+        yield from ijson.kvitems(file, '', use_float=True)
+    elif orjson is not None:
+        yield from orjson.loads(file.read()).items()
+    else:
+        yield from json.load(file).items()
+
+def parse_pubdate_year(pubdate):
+    """
+    Extracts the publication year from a PubMed pubdate value.
+
+    Args:
+        pubdate (str): The pubdate, e.g. "2020-05-01", "2020" or "Spring 2001".
+
+    Returns:
+        int: The year, or None if the pubdate has no 4-digit year.
+    """
+    if not pubdate:
+        return None
+    match = YEAR_PATTERN.search(str(pubdate))
+    return int(match.group()) if match else None
+
+def process_pubmed_data(
+    json_data: Iterable[tuple[str, dict[str, Any]]]
+) -> tuple[dict[str, list[tuple]], dict[str, list[tuple]]]:
+    """
+    Processes PubMed JSON data into a structured knowledge graph
     representation (nodes and relationships) without exporting to CSV. This
     function is for internal data structuring.
 
     Args:
-        json_data (dict): The input JSON data, where keys are PMIDs.
+        json_data (iterable): (pmid, paper_data) pairs, e.g. from iter_pubmed_articles
+                              or dict.items() of the input JSON.
 
     Returns:
-        tuple: A tuple containing two dictionaries: one for all unique nodes and
-               one for all relationships, ready for export.
+        tuple: A tuple containing two dictionaries: one mapping each node type to a
+               list of unique node tuples (columns as in NODE_SCHEMAS) and one for
+               all relationships, ready for export.
     """
-    # Use dictionaries to store unique entities, with a structure suitable for CSV headers
-    # The structure includes a 'nodeId' to easily identify the node
-    nodes = {
-        'Paper': {},
-        'Author': {},
-        'MeshTerm': {},
-        'PublicationType': {},
-        'Chemical': {},
-        'Keyword': {},
-        'Grant': {},
-        'Journal': {},
-        'Country': {}
-    }
-    # Use a dictionary to store relationships, keyed by type
-    relationships = {
-        'WROTE': [],
-        'HAS_MESH_TERM': [],
-        'HAS_PUBLICATION_TYPE': [],
-        'CONTAINS_CHEMICAL': [],
-        'HAS_KEYWORD': [],
-        'FUNDED_BY': [],
-        'PUBLISHED_IN': [],
-        'PUBLISHED_FROM': [],
-        'CITES': []
-    }
-
-    for pmid, paper_data in json_data.items():
+    # Store unique entities as tuples ordered as in NODE_SCHEMAS, the first
+    # column being the 'nodeId'; the seen sets keep only the first occurrence
+    nodes: dict[str, list[tuple]] = {node_type: [] for node_type in NODE_SCHEMAS}
+    seen_node_ids: dict[str, set[str]] = {node_type: set() for node_type in NODE_SCHEMAS}
+    # Store relationships as tuples ordered as in REL_SCHEMAS, keyed by type
+    relationships: dict[str, list[tuple]] = {rel_type: [] for rel_type in REL_SCHEMAS}
+    # The same citation text recurs for every paper citing a work; keep one copy of each
+    citation_texts: dict[Any, Any] = {}
+    intern_citation = citation_texts.setdefault
+    # Node IDs already built from a raw input value, so an entity seen before costs
+    # one lookup and its rows share one ID string; a hit also means the node exists
+    # (papers excepted, since a cited paper's ID is cached before its node is made)
+    node_id_cache: dict[str, dict[Any, str]] = {node_type: {} for node_type in NODE_SCHEMAS}
+    paper_ids = node_id_cache['Paper']
+    author_ids = node_id_cache['Author']
+    mesh_ids = node_id_cache['MeshTerm']
+    pub_type_ids = node_id_cache['PublicationType']
+    chem_ids = node_id_cache['Chemical']
+    keyword_ids = node_id_cache['Keyword']
+    grant_ids = node_id_cache['Grant']
+    journal_ids = node_id_cache['Journal']
+    country_ids = node_id_cache['Country']
+    # Bind each relationship list's append once; they run for every occurrence
+    add_wrote = relationships['WROTE'].append
+    add_has_mesh_term = relationships['HAS_MESH_TERM'].append
+    add_has_publication_type = relationships['HAS_PUBLICATION_TYPE'].append
+    add_contains_chemical = relationships['CONTAINS_CHEMICAL'].append
+    add_has_keyword = relationships['HAS_KEYWORD'].append
+    add_funded_by = relationships['FUNDED_BY'].append
+    add_published_in = relationships['PUBLISHED_IN'].append
+    add_published_from = relationships['PUBLISHED_FROM'].append
+    add_cites = relationships['CITES'].append
+
+    for pmid, paper_data in json_data:
+        # Bind the lookup once; it is used for every field of the paper
+        get = paper_data.get
+
         # --- Create Paper Node ---
-        paper_node_id = f"Paper_{pmid}"
-        nodes['Paper'][paper_node_id] = {
-            'nodeId': paper_node_id,
-            'pmid': pmid,
-            'title': paper_data.get('title'),
-            'abstract': paper_data.get('abstract'),
-            'pubdate': paper_data.get('pubdate'),
-            'doi': paper_data.get('doi'),
-            'pages': paper_data.get('pages'),
-            'issue': paper_data.get('issue'),
-            'languages': paper_data.get('languages')
-        }
+        paper_node_id = paper_ids.get(pmid)
+        if paper_node_id is None:
+            paper_node_id = paper_ids[pmid] = f"Paper_{pmid}"
+        if paper_node_id not in seen_node_ids['Paper']:
+            seen_node_ids['Paper'].add(paper_node_id)
+            pubdate = get('pubdate')
+            nodes['Paper'].append(select_paper_columns((
+                paper_node_id,
+                pmid,
+                get('title'),
+                get('abstract'),
+                pubdate,
+                parse_pubdate_year(pubdate) if 'year' in INCLUDE_FIELDS else None,
+                get('doi'),
+                get('pages'),
+                get('issue'),
+                get('languages')
+            )))
 
         # --- Create Author Nodes and WROTE relationships ---
-        authors = paper_data.get('authors', [])
+        authors = get('authors', [])
         for author_name in authors:
-            author_node_id = f"Author_{author_name.replace(' ', '_').replace('.', '')}"
-            nodes['Author'][author_node_id] = {'nodeId': author_node_id, 'name': author_name}
-            # startNode=author_name (Author), endNode=pmid (Paper)
-            relationships['WROTE'].append({
-                'startNode': author_name.replace(' ', '_').replace('.', ''),
-                'endNode': pmid
-            })
+            author_node_id = author_ids.get(author_name)
+            if author_node_id is None:
+                author_node_id = author_ids[author_name] = f"Author_{author_name.translate(AUTHOR_ID_TABLE)}"
+                if author_node_id not in seen_node_ids['Author']:
+                    seen_node_ids['Author'].add(author_node_id)
+                    nodes['Author'].append((author_node_id, author_name))
+            # startNode=Author, endNode=Paper
+            add_wrote((author_node_id, paper_node_id))
 
         # --- Create MeshTerm Nodes and HAS_MESH_TERM relationships ---
-        mesh_terms = paper_data.get('mesh_terms', [])
+        mesh_terms = get('mesh_terms', [])
         for term_with_id in mesh_terms:
-            term_id, term = term_with_id.split(':', 1)
-            mesh_node_id = f"{term}_{term_id}"
-            nodes['MeshTerm'][mesh_node_id] = {'nodeId': mesh_node_id, 'term': term, 'mesh_id': term_id}
-            # startNode=pmid (Paper), endNode=term_id (MeshTerm)
-            relationships['HAS_MESH_TERM'].append({
-                'startNode': pmid,
-                'endNode': term_id
-            })
+            mesh_node_id = mesh_ids.get(term_with_id)
+            if mesh_node_id is None:
+                term_id, sep, term = term_with_id.partition(':')
+                if not sep:
+                    # Skip entries without the ID:Term format
+                    continue
+                mesh_node_id = mesh_ids[term_with_id] = f"{term}_{term_id}"
+                if mesh_node_id not in seen_node_ids['MeshTerm']:
+                    seen_node_ids['MeshTerm'].add(mesh_node_id)
+                    nodes['MeshTerm'].append((mesh_node_id, term, term_id))
+            # startNode=Paper, endNode=MeshTerm
+            add_has_mesh_term((paper_node_id, mesh_node_id))
 
         # --- Create PublicationType Nodes and HAS_PUBLICATION_TYPE relationships ---
-        pub_types = paper_data.get('publication_types', [])
+        pub_types = get('publication_types', [])
         for type_with_id in pub_types:
-            type_id, pub_type = type_with_id.split(':', 1)
-            pub_type_node_id = f"{pub_type}_{type_id}"
-            nodes['PublicationType'][pub_type_node_id] = {'nodeId': pub_type_node_id, 'type': pub_type, 'type_id': type_id}
-            # startNode=pmid (Paper), endNode=type_id (PublicationType)
-            relationships['HAS_PUBLICATION_TYPE'].append({
-                'startNode': pmid,
-                'endNode': type_id
-            })
+            pub_type_node_id = pub_type_ids.get(type_with_id)
+            if pub_type_node_id is None:
+                type_id, sep, pub_type = type_with_id.partition(':')
+                if not sep:
+                    continue
+                pub_type_node_id = pub_type_ids[type_with_id] = f"{pub_type}_{type_id}"
+                if pub_type_node_id not in seen_node_ids['PublicationType']:
+                    seen_node_ids['PublicationType'].add(pub_type_node_id)
+                    nodes['PublicationType'].append((pub_type_node_id, pub_type, type_id))
+            # startNode=Paper, endNode=PublicationType
+            add_has_publication_type((paper_node_id, pub_type_node_id))
 
         # --- Create Chemical Nodes and CONTAINS_CHEMICAL relationships ---
-        chemicals = paper_data.get('chemical_list', [])
+        chemicals = get('chemical_list', [])
         for chem_with_id in chemicals:
-            chem_name, chem_id = chem_with_id.split(':', 1)
-            chem_node_id = f"Chemical_{chem_id}"
-            nodes['Chemical'][chem_node_id] = {'nodeId': chem_node_id, 'name': chem_name, 'chemical_id': chem_id}
-            # startNode=pmid (Paper), endNode=chem_id (Chemical)
-            relationships['CONTAINS_CHEMICAL'].append({
-                'startNode': pmid,
-                'endNode': chem_id
-            })
+            chem_node_id = chem_ids.get(chem_with_id)
+            if chem_node_id is None:
+                chem_name, sep, chem_id = chem_with_id.partition(':')
+                if not sep:
+                    continue
+                chem_node_id = chem_ids[chem_with_id] = f"Chemical_{chem_id}"
+                if chem_node_id not in seen_node_ids['Chemical']:
+                    seen_node_ids['Chemical'].add(chem_node_id)
+                    nodes['Chemical'].append((chem_node_id, chem_name, chem_id))
+            # startNode=Paper, endNode=Chemical
+            add_contains_chemical((paper_node_id, chem_node_id))
 
         # --- Create Keyword Nodes and HAS_KEYWORD relationships ---
-        keywords = paper_data.get('keywords', [])
+        keywords = get('keywords', [])
         for keyword_text in keywords:
-            keyword_node_id = f"Keyword_{keyword_text.replace(' ', '_').replace('/', '_')}"
-            nodes['Keyword'][keyword_node_id] = {'nodeId': keyword_node_id, 'keyword': keyword_text}
-            # startNode=pmid (Paper), endNode=keyword_text (Keyword)
-            relationships['HAS_KEYWORD'].append({
-                'startNode': pmid,
-                'endNode': keyword_text.replace(' ', '_').replace('/', '_')
-            })
+            keyword_node_id = keyword_ids.get(keyword_text)
+            if keyword_node_id is None:
+                keyword_node_id = keyword_ids[keyword_text] = f"Keyword_{keyword_text.translate(KEYWORD_ID_TABLE)}"
+                if keyword_node_id not in seen_node_ids['Keyword']:
+                    seen_node_ids['Keyword'].add(keyword_node_id)
+                    nodes['Keyword'].append((keyword_node_id, keyword_text))
+            # startNode=Paper, endNode=Keyword
+            add_has_keyword((paper_node_id, keyword_node_id))
 
         # --- Create Grant Nodes and FUNDED_BY relationships ---
-        grants = paper_data.get('grant_ids', [])
+        grants = get('grant_ids', [])
         for grant_info in grants:
+            grant_get = grant_info.get
+            grant_id = grant_get('grant_id')
             # If grant_id is not available, combine country and agency as grant_id
-            if not grant_info.get('grant_id'):
-                grant_id = f"{grant_info.get('country', '')}_{grant_info.get('agency', '')}"
-            else:
-                grant_id = grant_info.get('grant_id')
-                
-            grant_node_id = f"Grant_{grant_id}"
-            nodes['Grant'][grant_node_id] = {
-                'nodeId': grant_node_id,
-                'grant_id': grant_id,
-                'grant_acronym': grant_info.get('grant_acronym'),
-                'country': grant_info.get('country'),
-                'agency': grant_info.get('agency')
-            }
-            # startNode=pmid (Paper), endNode=grant_id (Grant)
-            relationships['FUNDED_BY'].append({
-                'startNode': pmid,
-                'endNode': grant_id
-            })
+            if not grant_id:
+                grant_id = f"{grant_get('country', '')}_{grant_get('agency', '')}"
+
+            grant_node_id = grant_ids.get(grant_id)
+            if grant_node_id is None:
+                grant_node_id = grant_ids[grant_id] = f"Grant_{grant_id}"
+                if grant_node_id not in seen_node_ids['Grant']:
+                    seen_node_ids['Grant'].add(grant_node_id)
+                    nodes['Grant'].append((
+                        grant_node_id,
+                        grant_id,
+                        grant_get('grant_acronym'),
+                        grant_get('country'),
+                        grant_get('agency')
+                    ))
+            # startNode=Paper, endNode=Grant
+            add_funded_by((paper_node_id, grant_node_id))
 
         # --- Create Journal Node and PUBLISHED_IN relationship ---
-        journal_name = paper_data.get('journal')
+        journal_name = get('journal')
         if journal_name:
-            journal_node_id = f"Journal_{journal_name.replace(' ', '_')}"
-            nodes['Journal'][journal_node_id] = {
-                'nodeId': journal_node_id,
-                'name': journal_name,
-                'nlm_unique_id': paper_data.get('nlm_unique_id'),
-                'issn_linking': paper_data.get('issn_linking'),
-                'medline_ta': paper_data.get('medline_ta')
-            }
-            # startNode=pmid (Paper), endNode=journal_name (Journal)
-            relationships['PUBLISHED_IN'].append({
-                'startNode': pmid,
-                'endNode': journal_name.replace(' ', '_')
-            })
+            journal_node_id = journal_ids.get(journal_name)
+            if journal_node_id is None:
+                journal_node_id = journal_ids[journal_name] = f"Journal_{journal_name.translate(SPACE_ID_TABLE)}"
+                if journal_node_id not in seen_node_ids['Journal']:
+                    seen_node_ids['Journal'].add(journal_node_id)
+                    nodes['Journal'].append((
+                        journal_node_id,
+                        journal_name,
+                        get('nlm_unique_id'),
+                        get('issn_linking'),
+                        get('medline_ta')
+                    ))
+            # startNode=Paper, endNode=Journal
+            add_published_in((paper_node_id, journal_node_id))
 
         # --- Create Country Node and PUBLISHED_FROM relationship ---
-        country_name = paper_data.get('country')
+        country_name = get('country')
         if country_name:
-            country_node_id = f"Country_{country_name.replace(' ', '_')}"
-            nodes['Country'][country_node_id] = {'nodeId': country_node_id, 'name': country_name}
-            # startNode=pmid (Paper), endNode=country_name (Country)
-            relationships['PUBLISHED_FROM'].append({
-                'startNode': pmid,
-                'endNode': country_name.replace(' ', '_')
-            })
+            country_node_id = country_ids.get(country_name)
+            if country_node_id is None:
+                country_node_id = country_ids[country_name] = f"Country_{country_name.translate(SPACE_ID_TABLE)}"
+                if country_node_id not in seen_node_ids['Country']:
+                    seen_node_ids['Country'].add(country_node_id)
+                    nodes['Country'].append((country_node_id, country_name))
+            # startNode=Paper, endNode=Country
+            add_published_from((paper_node_id, country_node_id))
 
         # --- Create CITES relationship for references ---
-        references = paper_data.get('references', [])
+        references = get('references') or ()
         for ref_info in references:
-            cited_pmid = ref_info.get('pmid')
+            ref_get = ref_info.get
+            cited_pmid = ref_get('pmid')
             if cited_pmid:
-                cited_paper_node_id = f"Paper_{cited_pmid}"
-                # startNode=pmid (Paper), endNode=cited_pmid (Paper)
-                relationships['CITES'].append({
-                    'startNode': pmid,
-                    'endNode': cited_pmid,
-                    'citation_text': ref_info.get('citation')
-                })
+                cited_node_id = paper_ids.get(cited_pmid)
+                if cited_node_id is None:
+                    cited_node_id = paper_ids[cited_pmid] = f"Paper_{cited_pmid}"
+                citation = ref_get('citation')
+                # startNode=Paper, endNode=cited Paper
+                add_cites((paper_node_id, cited_node_id, intern_citation(citation, citation)))
     
     return nodes, relationships
 
-def write_json_files(nodes, relationships, output_dir):
+def iter_chunks(json_data, chunk_size):
     """
-    Writes the provided nodes and relationships data to a JSON file.
+    Groups (pmid, paper_data) pairs into lists of at most chunk_size papers.
 
     Args:
-        nodes (dict): A dictionary of node data, keyed by node type.
-        relationships (dict): A dictionary of relationship data, keyed by type.
-        output_dir (str): The directory path to save the JSON file.
+        json_data (iterable): (pmid, paper_data) pairs.
+        chunk_size (int): Maximum number of papers per chunk.
+    """
+    iterator = iter(json_data)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def merge_data(results):
+    """
+    Merges the (nodes, relationships) tuples produced for several chunks into a
+    single pair, keeping the first occurrence of every node.
+
+    Args:
+        results (iterable): (nodes, relationships) tuples from process_pubmed_data.
+
+    Returns:
+        tuple: The merged (nodes, relationships).
+    """
+    nodes = {node_type: [] for node_type in NODE_SCHEMAS}
+    seen_node_ids = {node_type: set() for node_type in NODE_SCHEMAS}
+    relationships = {rel_type: [] for rel_type in REL_SCHEMAS}
+
+    for chunk_nodes, chunk_relationships in results:
+        for node_type, node_rows in chunk_nodes.items():
+            seen = seen_node_ids[node_type]
+            merged_rows = nodes[node_type]
+            for node_row in node_rows:
+                if node_row[0] not in seen:
+                    seen.add(node_row[0])
+                    merged_rows.append(node_row)
+        for rel_type, rel_list in chunk_relationships.items():
+            relationships[rel_type].extend(rel_list)
+
+    return nodes, relationships
+
+def process_pubmed_data_parallel(json_data, workers, chunk_size):
+    """
+    Runs process_pubmed_data over chunks of papers in a pool of worker processes
+    and merges the partial graphs. Results are merged in input order, so the
+    output matches a serial run. Only a few chunks per worker are in flight at
+    once, which keeps a streamed input from being read into memory ahead of the
+    workers.
+
+    Args:
+        json_data (iterable): (pmid, paper_data) pairs.
+        workers (int): Number of worker processes.
+        chunk_size (int): Number of papers sent to a worker at a time.
+
+    Returns:
+        tuple: The merged (nodes, relationships), as from process_pubmed_data.
+    """
+    if workers <= 1:
+        return process_pubmed_data(json_data)
+
+    def chunk_results(executor):
+        pending = deque()
+        for chunk in iter_chunks(json_data, chunk_size):
+            pending.append(executor.submit(process_pubmed_data, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        return merge_data(chunk_results(executor))
+
+def encode_json(data):
+    """
+    Serialises data to indented UTF-8 JSON bytes, using orjson when it is installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+def write_json_array(f, records):
+    """
+    Streams records to a binary file as an indented JSON array nested one level
+    inside the top-level object. Each record is serialised on its own, so the
+    encoded output for the whole array is never held in memory.
+
+    Args:
+        f: A file object opened in binary mode.
+        records (iterable): The dictionaries to write.
+    """
+    f.write(b'[')
+    wrote_record = False
+    for record in records:
+        f.write(b',\n    ' if wrote_record else b'\n    ')
+        # JSON strings never contain raw newlines, so this only re-indents the structure
+        f.write(encode_json(record).replace(b'\n', b'\n    '))
+        wrote_record = True
+    if wrote_record:
+        f.write(b'\n  ')
+    f.write(b']')
+
+def iter_nodes(nodes):
+    """
+    Yields every node as a flat dictionary with its 'id' and 'type', built on
+    demand from the node tuples.
+
+    Args:
+        nodes (dict): Lists of node tuples (columns as in NODE_SCHEMAS), keyed by node type.
+    """
+    for node_type, node_rows in nodes.items():
+        headers = NODE_SCHEMAS[node_type]
+        for node_row in node_rows:
+            yield {'id': node_row[0], 'type': node_type, **dict(zip(headers, node_row))}
+
+def iter_rels(relationships):
+    """
+    Yields every relationship as a flat dictionary with its 'type', built on
+    demand from the relationship tuples.
+
+    Args:
+        relationships (dict): Lists of relationship tuples (columns as in REL_SCHEMAS), keyed by type.
     """
-    # Flatten the nodes dictionary to a list of unique nodes
-    unique_nodes = []
-    for node_type, node_dict in nodes.items():
-        for node_id, node_data in node_dict.items():
-            node = {'id': node_id, 'type': node_type, **node_data}
-            unique_nodes.append(node)
-            
-    # Flatten the relationships dictionary
-    all_relationships = []
     for rel_type, rel_list in relationships.items():
-        for rel_data in rel_list:
-            all_relationships.append({'type': rel_type, **rel_data})
+        headers = REL_SCHEMAS[rel_type]
+        for rel_row in rel_list:
+            yield {'type': rel_type, **dict(zip(headers, rel_row))}
 
-    kg_representation = {
-        'nodes': unique_nodes,
-        'relationships': all_relationships
-    }
+def write_json_files(nodes, relationships, output_dir):
+    """
+    Writes the provided nodes and relationships data to a JSON file.
 
+    Args:
+        nodes (dict): Lists of node tuples (columns as in NODE_SCHEMAS), keyed by node type.
+        relationships (dict): Lists of relationship tuples (columns as in REL_SCHEMAS), keyed by type.
+        output_dir (str): The directory path to save the JSON file.
+    """
+    # Write {"nodes": [...], "relationships": [...]} one record at a time, so the
+    # flat dictionaries are never all held in memory together
     output_file_path = os.path.join(output_dir, "pubmed_knowledge_graph.json")
-    with open(output_file_path, 'w', encoding='utf-8') as f:
-        json.dump(kg_representation, f, indent=2, ensure_ascii=False)
+    with open(output_file_path, 'wb') as f:
+        f.write(b'{\n  "nodes": ')
+        write_json_array(f, iter_nodes(nodes))
+        f.write(b',\n  "relationships": ')
+        write_json_array(f, iter_rels(relationships))
+        f.write(b'\n}')
 
 def write_csv_files(nodes, relationships, output_dir_nodes, output_dir_rels):
     """
-    Writes the provided nodes and relationships data to a set of CSV files.
+    Writes the provided nodes and relationships data to a set of CSV files that
+    `neo4j-admin database import` can load directly.
 
     Args:
-        nodes (dict): A dictionary of node data, keyed by node type.
-        relationships (dict): A dictionary of relationship data, keyed by type.
+        nodes (dict): Lists of node tuples (columns as in NODE_SCHEMAS), keyed by node type.
+        relationships (dict): Lists of relationship tuples (columns as in REL_SCHEMAS), keyed by type.
         output_dir_nodes (str): The directory path to save the node CSV files.
         output_dir_rels (str): The directory path to save the relationship CSV files.
     """
-    # Export nodes to CSV
-    for node_type, node_dict in nodes.items():
-        if node_dict:
-            headers = list(list(node_dict.values())[0].keys())
-            with open(os.path.join(output_dir_nodes, f'{node_type.lower()}_nodes.csv'), 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=headers)
-                writer.writeheader()
-                writer.writerows(node_dict.values())
+    # Export nodes to CSV; rows are already tuples in header order, plus the label
+    for node_type, node_rows in nodes.items():
+        if node_rows:
+            with open(os.path.join(output_dir_nodes, f'{node_type.lower()}_nodes.csv'), 'w', newline='', encoding='utf-8', buffering=CSV_BUFFER_SIZE) as f:
+                writer = csv.writer(f)
+                writer.writerow(NODE_CSV_HEADERS[node_type])
+                label = (node_type,)
+                writer.writerows(node_row + label for node_row in node_rows)
     
     # Export relationships to CSV
     for rel_type, rel_list in relationships.items():
+        if rel_type == 'CITES' and not KEEP_DANGLING_CITATIONS:
+            paper_node_ids = {node_row[0] for node_row in nodes['Paper']}
+            cited_rows = len(rel_list)
+            rel_list = [rel_row for rel_row in rel_list if rel_row[1] in paper_node_ids]
+            print(f"Skipped {cited_rows - len(rel_list)} CITES relationships to papers outside the input")
         if rel_list:
-            rel_headers = list(rel_list[0].keys())
-            with open(os.path.join(output_dir_rels, f'{rel_type.lower()}_rels.csv'), 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=rel_headers)
-                writer.writeheader()
-                writer.writerows(rel_list)
+            with open(os.path.join(output_dir_rels, f'{rel_type.lower()}_rels.csv'), 'w', newline='', encoding='utf-8', buffering=CSV_BUFFER_SIZE) as f:
+                writer = csv.writer(f)
+                writer.writerow(REL_CSV_HEADERS[rel_type])
+                writer.writerows(rel_row[:2] + (rel_type,) + rel_row[2:] for rel_row in rel_list)
 
 def main():
     """
@@ -250,6 +557,9 @@ def main():
     csv_nodes_dir = os.path.join(csv_dir, "nodes")
     csv_rels_dir = os.path.join(csv_dir, "relationships")
     input_file_path = "/Users/gopinath.balu/Workspace/agentic_ai_innovations/intermediate_parsed/pubmed_articles.json"
+    # Papers are converted in chunks across all available cores
+    workers = os.cpu_count() or 1
+    chunk_size = 5000
     
     # Create the output directories if they don't exist
     for directory in [json_dir, csv_nodes_dir, csv_rels_dir]:
@@ -259,40 +569,34 @@ def main():
         print(f"Error: Input file not found at {input_file_path}")
         return
     
+    # Stream the articles straight into the graph builder
     try:
-        with open(input_file_path, 'r', encoding='utf-8') as file:
-            json_data = json.load(file)
-    except json.JSONDecodeError:
+        with open(input_file_path, 'rb') as file:
+            nodes, relationships = process_pubmed_data_parallel(iter_pubmed_articles(file), workers, chunk_size)
+    except JSON_DECODE_ERRORS:
         print(f"Error: Could not parse JSON from {input_file_path}")
         return
-    except Exception as e:
+    except OSError as e:
         print(f"Error reading file: {str(e)}")
         return
     
     print(f"Successfully loaded data from {input_file_path}")
-    print(f"Number of articles loaded: {len(json_data)}")
+    print(f"Number of articles loaded: {len(nodes['Paper'])}")
     
-    # Process the data into graph representation
-    nodes, relationships = process_pubmed_data(json_data)
-    
-    # Count total nodes and relationships
-    total_nodes = sum(len(d) for d in nodes.values())
-    total_relationships = sum(len(d) for d in relationships.values())
+    # Count nodes and relationships by type; they are already grouped, so this is O(types)
+    node_counts = {node_type: len(node_rows) for node_type, node_rows in nodes.items()}
+    rel_counts = {rel_type: len(rel_list) for rel_type, rel_list in relationships.items()}
+    total_nodes = sum(node_counts.values())
+    total_relationships = sum(rel_counts.values())
 
     print("\n--- Knowledge Graph Summary ---")
     print(f"Total number of nodes: {total_nodes}")
     print(f"Total number of relationships: {total_relationships}")
     
-    # Count nodes by type
-    node_counts = {node_type: len(node_dict) for node_type, node_dict in nodes.items()}
-    
     print("\n--- Node Distribution ---")
     for node_type, count in node_counts.items():
         print(f"{node_type}: {count} nodes")
     
-    # Count relationships by type
-    rel_counts = {rel_type: len(rel_list) for rel_type, rel_list in relationships.items()}
-    
     print("\n--- Relationship Distribution ---")
     for rel_type, count in rel_counts.items():
         print(f"{rel_type}: {count} relationships")
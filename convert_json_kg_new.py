@@ -1,8 +1,91 @@
 import os
 import json
 import csv
+import shutil
 import hashlib
+import operator
+import functools
+import itertools
+import contextlib
+import tempfile
+import concurrent.futures
+from collections import deque
 
+# orjson is optional; fall back to the standard library when it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ijson is optional; without it the whole input file is parsed up front
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+JSON_DECODE_ERRORS = (json.JSONDecodeError,) if ijson is None else (json.JSONDecodeError, ijson.JSONError)
+
+# Column order of each node type; this is the order of the CSV columns
+NODE_SCHEMAS = {
+    'Paper': ('id', 'pmid', 'title', 'abstract', 'pubdate', 'doi', 'pages', 'issue', 'languages'),
+    'Author': ('id', 'name'),
+    'MeshTerm': ('id', 'term', 'mesh_id'),
+    'PublicationType': ('id', 'type', 'type_id'),
+    'Chemical': ('id', 'name', 'chemical_id'),
+    'Keyword': ('id', 'keyword'),
+    'Grant': ('id', 'grant_id', 'grant_acronym', 'country', 'agency'),
+    'Journal': ('id', 'name', 'nlm_unique_id', 'issn_linking', 'medline_ta'),
+    'Country': ('id', 'name')
+}
+
+# Column order of each relationship type; relationships are stored as tuples in
+# this order and the same tuple doubles as the CSV header
+REL_SCHEMAS = {
+    'AUTHORED': ('startNode', 'endNode'),
+    'HAS_MESH_TERM': ('startNode', 'endNode'),
+    'HAS_PUBLICATION_TYPE': ('startNode', 'endNode'),
+    'CONTAINS_CHEMICAL': ('startNode', 'endNode'),
+    'HAS_KEYWORD': ('startNode', 'endNode'),
+    'FUNDED_BY': ('startNode', 'endNode'),
+    'PUBLISHED_IN': ('startNode', 'endNode'),
+    'PUBLISHED_FROM': ('startNode', 'endNode'),
+    'CITES': ('startNode', 'endNode', 'citation_text'),
+    # Inverse relationships for bidirectional connections
+    'AUTHOR_OF': ('startNode', 'endNode'),
+    'MESH_TERM_OF': ('startNode', 'endNode'),
+    'PUBLICATION_TYPE_OF': ('startNode', 'endNode'),
+    'CHEMICAL_IN': ('startNode', 'endNode'),
+    'KEYWORD_OF': ('startNode', 'endNode'),
+    'FUNDS': ('startNode', 'endNode'),
+    'PUBLISHES': ('startNode', 'endNode'),
+    'ORIGIN_OF': ('startNode', 'endNode'),
+    'CITED_BY': ('startNode', 'endNode', 'citation_text')
+}
+
+# Inverse of each forward relationship type. Inverse edges carry no data of their
+# own, so they are written from the forward rows with start and end swapped
+INVERSE_RELATIONSHIPS = {
+    'AUTHORED': 'AUTHOR_OF',
+    'HAS_MESH_TERM': 'MESH_TERM_OF',
+    'HAS_PUBLICATION_TYPE': 'PUBLICATION_TYPE_OF',
+    'CONTAINS_CHEMICAL': 'CHEMICAL_IN',
+    'HAS_KEYWORD': 'KEYWORD_OF',
+    'FUNDED_BY': 'FUNDS',
+    'PUBLISHED_IN': 'PUBLISHES',
+    'PUBLISHED_FROM': 'ORIGIN_OF',
+    'CITES': 'CITED_BY'
+}
+
+# Buffer size for the CSV, spill and JSON output files, so millions of small
+# records reach the disk in few writes
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Whitespace characters that sanitize_keys replaces with underscores
+KEY_WHITESPACE_TABLE = str.maketrans({' ': '_', '\t': '_', '\n': '_'})
+
+# Author, keyword and country names repeat heavily across papers, so hashed IDs are
+# memoised; the bound keeps memory flat on full PubMed dumps
+@functools.lru_cache(maxsize=1 << 20)
 def generate_deterministic_id(text):
     """
     Generates a consistent, unique ID for entities without a standard ID
@@ -10,52 +93,80 @@ def generate_deterministic_id(text):
     """
     if not text:
         return None
-    # Use a secure hash to create a short, consistent identifier
+    # Use a secure hash to create a short, consistent identifier. These IDs end up
+    # in graphs built from earlier runs, so switching the hash would break joins
     return hashlib.sha1(text.encode('utf-8')).hexdigest()[:10]
 
 def sanitize_keys(data):
     """
-    Recursively sanitize dictionary keys by replacing any whitespace with underscore.
-    Works with nested dictionaries and lists containing dictionaries.
+    Sanitize dictionary keys by replacing any whitespace with underscore.
+    Works with nested dictionaries and lists containing dictionaries, as produced
+    by a JSON parser, which are walked with an explicit stack and rewritten in
+    place; dictionaries whose keys are already clean are left untouched.
     
     Args:
         data: Dictionary, list, or any other data structure to sanitize
         
     Returns:
-        The sanitized data structure with whitespace in keys replaced by underscores
+        The same data structure, with whitespace in keys replaced by underscores
     """
-    if isinstance(data, dict):
-        # Create a new dictionary with sanitized keys
-        sanitized_dict = {}
-        for key, value in data.items():
-            # Replace whitespace with underscore in the key
-            sanitized_key = key.replace(" ", "_") if isinstance(key, str) else key
-            # Recursively sanitize the value
-            sanitized_dict[sanitized_key] = sanitize_keys(value)
-        return sanitized_dict
-    elif isinstance(data, list):
-        # Recursively sanitize each item in the list
-        return [sanitize_keys(item) for item in data]
+    stack = [data]
+    push = stack.append
+    while stack:
+        item = stack.pop()
+        if type(item) is dict:
+            for value in item.values():
+                if type(value) is dict or type(value) is list:
+                    push(value)
+            # Parsed JSON keys are always strings, so one joined string covers them
+            # all; the common clean dictionary costs a single scan
+            keys = '\0'.join(item)
+            if ' ' in keys or '\t' in keys or '\n' in keys:
+                # Rebuild in place so the key order is preserved
+                items = list(item.items())
+                item.clear()
+                for key, value in items:
+                    item[key.translate(KEY_WHITESPACE_TABLE)] = value
+        elif type(item) is list:
+            # Only containers need visiting; primitive values are kept as is
+            for value in item:
+                if type(value) is dict or type(value) is list:
+                    push(value)
+    return data
+
+def iter_pubmed_articles(file):
+    """
+    Yields (pmid, paper_data) pairs from a PubMed JSON file opened in binary mode.
+    Papers are streamed one at a time with ijson when it is installed, so the
+    full input never has to be held in memory.
+
+    Args:
+        file: A binary file object containing a JSON object keyed by PMID.
+    """
+    if ijson is not None:
+        yield from ijson.kvitems(file, '', use_float=True)
+    elif orjson is not None:
+        yield from orjson.loads(file.read()).items()
     else:
-        # Return primitive values as is
-        return data
+        yield from json.load(file).items()
 
 def process_pubmed_data(json_data):
     """
-    Processes a dictionary of PubMed JSON data into a structured knowledge graph
+    Processes PubMed JSON data into a structured knowledge graph
     representation (nodes and relationships) without exporting to CSV. This
     function is for internal data structuring.
 
     Args:
-        json_data (dict): The input JSON data, where keys are PMIDs.
+        json_data (iterable): (pmid, paper_data) pairs, e.g. from iter_pubmed_articles
+                              or dict.items() of the input JSON.
 
     Returns:
         tuple: A tuple containing two dictionaries: one for all unique nodes and
-               one for all relationships, ready for export.
+               one mapping each relationship type to a list of tuples (columns as
+               in REL_SCHEMAS), ready for export.
     """
-    # Sanitize all keys in the input data to ensure no whitespace
-    json_data = sanitize_keys(json_data)
-    
+    # Node dictionaries keyed by node ID; each one carries its 'type' tag in the
+    # position the JSON export expects, and the CSV columns are read by name
     nodes = {
         'Paper': {},
         'Author': {},
@@ -67,129 +178,92 @@ def process_pubmed_data(json_data):
         'Journal': {},
         'Country': {}
     }
-    relationships = {
-        'AUTHORED': [],
-        'HAS_MESH_TERM': [],
-        'HAS_PUBLICATION_TYPE': [],
-        'CONTAINS_CHEMICAL': [],
-        'HAS_KEYWORD': [],
-        'FUNDED_BY': [],
-        'PUBLISHED_IN': [],
-        'PUBLISHED_FROM': [],
-        'CITES': [],
-        # Add inverse relationships for bidirectional connections
-        'AUTHOR_OF': [],
-        'MESH_TERM_OF': [],
-        'PUBLICATION_TYPE_OF': [],
-        'CHEMICAL_IN': [],
-        'KEYWORD_OF': [],
-        'FUNDS': [],
-        'PUBLISHES': [],
-        'ORIGIN_OF': [],
-        'CITED_BY': []
-    }
+    # Relationships are stored as tuples ordered as in REL_SCHEMAS, keyed by type;
+    # only the forward direction is kept, stream_pubmed_data writes the inverses
+    relationships = {rel_type: [] for rel_type in INVERSE_RELATIONSHIPS}
+
+    for pmid, paper_data in json_data:
+        # Sanitize all keys in the paper data to ensure no whitespace
+        paper_data = sanitize_keys(paper_data)
+        # Bind the lookup once; it is used for every field of the paper
+        get = paper_data.get
 
-    for pmid, paper_data in json_data.items():
         # --- Create Paper Node using PMID as key ---
         pmid_id = f"Paper_{pmid}"
-        nodes['Paper'][pmid_id] = {
-            'id': pmid_id,
-            'pmid': pmid,
-            'title': paper_data.get('title'),
-            'abstract': paper_data.get('abstract'),
-            'pubdate': paper_data.get('pubdate'),
-            'doi': paper_data.get('doi'),
-            'pages': paper_data.get('pages'),
-            'issue': paper_data.get('issue'),
-            'languages': paper_data.get('languages')
-        }
+        # A repeated PMID keeps its first record, as it does across chunks
+        if pmid_id not in nodes['Paper']:
+            nodes['Paper'][pmid_id] = {
+                'id': pmid_id,
+                'type': 'Paper',
+                'pmid': pmid,
+                'title': get('title'),
+                'abstract': get('abstract'),
+                'pubdate': get('pubdate'),
+                'doi': get('doi'),
+                'pages': get('pages'),
+                'issue': get('issue'),
+                'languages': get('languages')
+            }
 
         # --- Create Author Nodes and bidirectional AUTHORED/AUTHOR_OF relationships ---
-        authors = paper_data.get('authors', [])
+        authors = get('authors', [])
         for author_name in authors:
             # Use a deterministic ID as a proxy for ORCID
             author_id = f"Author_{generate_deterministic_id(author_name)}"
-            nodes['Author'][author_id] = {'id': author_id, 'name': author_name}
+            if author_id not in nodes['Author']:
+                nodes['Author'][author_id] = {'id': author_id, 'type': 'Author', 'name': author_name}
             # Start and end nodes now use the new IDs
-            relationships['AUTHORED'].append({
-                'startNode': author_id,
-                'endNode': pmid_id
-            })
-            # Add inverse relationship
-            relationships['AUTHOR_OF'].append({
-                'startNode': pmid_id,
-                'endNode': author_id
-            })
+            relationships['AUTHORED'].append((author_id, pmid_id))
 
         # --- Create MeshTerm Nodes and bidirectional HAS_MESH_TERM/MESH_TERM_OF relationships ---
-        mesh_terms = paper_data.get('mesh_terms', [])
+        mesh_terms = get('mesh_terms', [])
         for term_with_id in mesh_terms:
-            term_id, term = term_with_id.split(':', 1)
+            term_id, sep, term = term_with_id.partition(':')
+            if not sep:
+                # Skip entries without the ID:Term format
+                continue
             mesh_node_id = f"MeshTerm_{term_id}"
-            nodes['MeshTerm'][mesh_node_id] = {'id': mesh_node_id, 'term': term, 'mesh_id': term_id}
+            if mesh_node_id not in nodes['MeshTerm']:
+                nodes['MeshTerm'][mesh_node_id] = {'id': mesh_node_id, 'type': 'MeshTerm', 'term': term, 'mesh_id': term_id}
             # The relationship uses the standardized Mesh ID
-            relationships['HAS_MESH_TERM'].append({
-                'startNode': pmid_id,
-                'endNode': mesh_node_id
-            })
-            # Add inverse relationship
-            relationships['MESH_TERM_OF'].append({
-                'startNode': mesh_node_id,
-                'endNode': pmid_id
-            })
+            relationships['HAS_MESH_TERM'].append((pmid_id, mesh_node_id))
 
         # --- Create PublicationType Nodes and bidirectional HAS_PUBLICATION_TYPE/PUBLICATION_TYPE_OF relationships ---
-        pub_types = paper_data.get('publication_types', [])
+        pub_types = get('publication_types', [])
         for type_with_id in pub_types:
-            type_id, pub_type = type_with_id.split(':', 1)
+            type_id, sep, pub_type = type_with_id.partition(':')
+            if not sep:
+                continue
             pub_type_node_id = f"PublicationType_{type_id}"
-            nodes['PublicationType'][pub_type_node_id] = {'id': pub_type_node_id, 'type': pub_type, 'type_id': type_id}
+            if pub_type_node_id not in nodes['PublicationType']:
+                # Here 'type' holds the publication type itself, which is what the JSON export has always shown
+                nodes['PublicationType'][pub_type_node_id] = {'id': pub_type_node_id, 'type': pub_type, 'type_id': type_id}
             # Relationship uses the standardized type ID
-            relationships['HAS_PUBLICATION_TYPE'].append({
-                'startNode': pmid_id,
-                'endNode': pub_type_node_id
-            })
-            # Add inverse relationship
-            relationships['PUBLICATION_TYPE_OF'].append({
-                'startNode': pub_type_node_id,
-                'endNode': pmid_id
-            })
+            relationships['HAS_PUBLICATION_TYPE'].append((pmid_id, pub_type_node_id))
 
         # --- Create Chemical Nodes and bidirectional CONTAINS_CHEMICAL/CHEMICAL_IN relationships ---
-        chemicals = paper_data.get('chemical_list', [])
+        chemicals = get('chemical_list', [])
         for chem_with_id in chemicals:
-            chem_id, chem_name = chem_with_id.split(':', 1)
+            chem_id, sep, chem_name = chem_with_id.partition(':')
+            if not sep:
+                continue
             chem_node_id = f"Chemical_{chem_id}"
-            nodes['Chemical'][chem_node_id] = {'id': chem_node_id, 'name': chem_name, 'chemical_id': chem_id}
+            if chem_node_id not in nodes['Chemical']:
+                nodes['Chemical'][chem_node_id] = {'id': chem_node_id, 'type': 'Chemical', 'name': chem_name, 'chemical_id': chem_id}
             # Relationship uses the standardized chemical ID
-            relationships['CONTAINS_CHEMICAL'].append({
-                'startNode': pmid_id,
-                'endNode': chem_node_id
-            })
-            # Add inverse relationship
-            relationships['CHEMICAL_IN'].append({
-                'startNode': chem_node_id,
-                'endNode': pmid_id
-            })
+            relationships['CONTAINS_CHEMICAL'].append((pmid_id, chem_node_id))
 
         # --- Create Keyword Nodes and bidirectional HAS_KEYWORD/KEYWORD_OF relationships ---
-        keywords = paper_data.get('keywords', [])
+        keywords = get('keywords', [])
         for keyword_text in keywords:
             keyword_id = f"Keyword_{generate_deterministic_id(keyword_text)}"
-            nodes['Keyword'][keyword_id] = {'id': keyword_id, 'keyword': keyword_text}
+            if keyword_id not in nodes['Keyword']:
+                nodes['Keyword'][keyword_id] = {'id': keyword_id, 'type': 'Keyword', 'keyword': keyword_text}
             # Relationship uses the generated ID
-            relationships['HAS_KEYWORD'].append({
-                'startNode': pmid_id,
-                'endNode': keyword_id
-            })
-            # Add inverse relationship
-            relationships['KEYWORD_OF'].append({
-                'startNode': keyword_id,
-                'endNode': pmid_id
-            })
+            relationships['HAS_KEYWORD'].append((pmid_id, keyword_id))
 
         # --- Create Grant Nodes and bidirectional FUNDED_BY/FUNDS relationships ---
-        grants = paper_data.get('grant_ids', [])
+        grants = get('grant_ids', [])
         for grant_info in grants:
             grant_id = grant_info.get('grant_id')
             # If grant_id is not available, create a deterministic ID from available info
@@ -198,132 +272,243 @@ def process_pubmed_data(json_data):
                 grant_id = intem_grant_key
 
             grant_node_id = f"Grant_{grant_id}"
-            nodes['Grant'][grant_node_id] = {
-                'id': grant_node_id,
-                'grant_id': grant_id,
-                'grant_acronym': grant_info.get('grant_acronym'),
-                'country': grant_info.get('country'),
-                'agency': grant_info.get('agency')
-            }
+            if grant_node_id not in nodes['Grant']:
+                nodes['Grant'][grant_node_id] = {
+                    'id': grant_node_id,
+                    'type': 'Grant',
+                    'grant_id': grant_id,
+                    'grant_acronym': grant_info.get('grant_acronym'),
+                    'country': grant_info.get('country'),
+                    'agency': grant_info.get('agency')
+                }
             # Relationship uses the grant ID
-            relationships['FUNDED_BY'].append({
-                'startNode': pmid_id,
-                'endNode': grant_node_id
-            })
-            # Add inverse relationship
-            relationships['FUNDS'].append({
-                'startNode': grant_node_id,
-                'endNode': pmid_id
-            })
+            relationships['FUNDED_BY'].append((pmid_id, grant_node_id))
 
         # --- Create Journal Node and bidirectional PUBLISHED_IN/PUBLISHES relationship ---
-        journal_name = paper_data.get('journal')
-        nlm_unique_id = paper_data.get('nlm_unique_id')
+        journal_name = get('journal')
+        nlm_unique_id = get('nlm_unique_id')
         if journal_name:
             # Use NLM Unique ID if available, otherwise use a deterministic hash of the name
             journal_id = nlm_unique_id if nlm_unique_id else generate_deterministic_id(journal_name)
             journal_node_id = f"Journal_{journal_id}"
-            nodes['Journal'][journal_node_id] = {
-                'id': journal_node_id,
-                'name': journal_name,
-                'nlm_unique_id': nlm_unique_id,
-                'issn_linking': paper_data.get('issn_linking'),
-                'medline_ta': paper_data.get('medline_ta')
-            }
+            if journal_node_id not in nodes['Journal']:
+                nodes['Journal'][journal_node_id] = {
+                    'id': journal_node_id,
+                    'type': 'Journal',
+                    'name': journal_name,
+                    'nlm_unique_id': nlm_unique_id,
+                    'issn_linking': get('issn_linking'),
+                    'medline_ta': get('medline_ta')
+                }
             # Relationship uses the journal ID
-            relationships['PUBLISHED_IN'].append({
-                'startNode': pmid_id,
-                'endNode': journal_node_id
-            })
-            # Add inverse relationship
-            relationships['PUBLISHES'].append({
-                'startNode': journal_node_id,
-                'endNode': pmid_id
-            })
+            relationships['PUBLISHED_IN'].append((pmid_id, journal_node_id))
 
         # --- Create Country Node and bidirectional PUBLISHED_FROM/ORIGIN_OF relationship ---
-        country_name = paper_data.get('country')
+        country_name = get('country')
         if country_name:
             country_id = generate_deterministic_id(country_name)
             country_node_id = f"Country_{country_id}"
-            nodes['Country'][country_node_id] = {'id': country_node_id, 'name': country_name}
+            if country_node_id not in nodes['Country']:
+                nodes['Country'][country_node_id] = {'id': country_node_id, 'type': 'Country', 'name': country_name}
             # Relationship uses the country ID
-            relationships['PUBLISHED_FROM'].append({
-                'startNode': pmid_id,
-                'endNode': country_node_id
-            })
-            # Add inverse relationship
-            relationships['ORIGIN_OF'].append({
-                'startNode': country_node_id,
-                'endNode': pmid_id
-            })
+            relationships['PUBLISHED_FROM'].append((pmid_id, country_node_id))
 
         # --- Create bidirectional CITES/CITED_BY relationship for references ---
-        references = paper_data.get('references', [])
+        references = get('references', [])
         for ref_info in references:
             cited_pmid = ref_info.get('pmid')
             if cited_pmid:
                 cited_paper_node_id = f"Paper_{cited_pmid}"
                 # The relationship uses the standardized PMID
-                relationships['CITES'].append({
-                    'startNode': pmid_id,
-                    'endNode': cited_paper_node_id,
-                    'citation_text': ref_info.get('citation')
-                })
-                # Add inverse relationship
-                relationships['CITED_BY'].append({
-                    'startNode': cited_paper_node_id,
-                    'endNode': pmid_id,
-                    'citation_text': ref_info.get('citation')
-                })
+                relationships['CITES'].append((pmid_id, cited_paper_node_id, ref_info.get('citation')))
     
     return nodes, relationships
 
-def write_json_files(nodes, relationships, output_dir):
+def iter_chunks(json_data, chunk_size):
     """
-    Writes the provided nodes and relationships data to a JSON file.
+    Groups (pmid, paper_data) pairs into lists of at most chunk_size papers.
+
+    Args:
+        json_data (iterable): (pmid, paper_data) pairs.
+        chunk_size (int): Maximum number of papers per chunk.
     """
-    unique_nodes = []
-    for node_type, node_dict in nodes.items():
-        for node_id, node_data in node_dict.items():
-            node = {'id': node_id, 'type': node_type, **node_data}
-            unique_nodes.append(node)
-            
-    all_relationships = []
-    for rel_type, rel_list in relationships.items():
-        for rel_data in rel_list:
-            all_relationships.append({'type': rel_type, **rel_data})
-
-    kg_representation = {
-        'nodes': unique_nodes,
-        'relationships': all_relationships
-    }
+    iterator = iter(json_data)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
 
-    output_file_path = os.path.join(output_dir, "pubmed_knowledge_graph.json")
-    with open(output_file_path, 'w', encoding='utf-8') as f:
-        json.dump(kg_representation, f, indent=2, ensure_ascii=False)
+def iter_processed_chunks(json_data, chunk_size, workers):
+    """
+    Yields the (nodes, relationships) result of process_pubmed_data for each
+    chunk of papers, in input order. With more than one worker the chunks are
+    converted in a pool of processes; only a few chunks per worker are in
+    flight at once, which keeps a streamed input from being read into memory
+    ahead of the workers.
 
-def write_csv_files(nodes, relationships, output_dir_nodes, output_dir_rels):
+    Args:
+        json_data (iterable): (pmid, paper_data) pairs.
+        chunk_size (int): Number of papers sent to a worker at a time.
+        workers (int): Number of worker processes.
     """
-    Writes the provided nodes and relationships data to a set of CSV files.
+    chunks = iter_chunks(json_data, chunk_size)
+    if workers <= 1:
+        yield from map(process_pubmed_data, chunks)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(process_pubmed_data, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def encode_json(data, pretty=False):
     """
-    for node_type, node_dict in nodes.items():
-        if node_dict:
-            headers = list(list(node_dict.values())[0].keys())
-            file_path = os.path.join(output_dir_nodes, f'{node_type.lower()}_nodes.csv')
-            with open(file_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=headers)
-                writer.writeheader()
-                writer.writerows(node_dict.values())
-    
-    for rel_type, rel_list in relationships.items():
-        if rel_list:
-            rel_headers = list(rel_list[0].keys())
-            file_path = os.path.join(output_dir_rels, f'{rel_type.lower()}_rels.csv')
-            with open(file_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=rel_headers)
-                writer.writeheader()
-                writer.writerows(rel_list)
+    Serialises data to UTF-8 JSON bytes, using orjson when it is installed.
+    The output is compact unless pretty is set, in which case it is indented
+    by two spaces.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else None)
+    if pretty:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def spill_json_records(f, records, pretty=False):
+    """
+    Appends records to a spill file as JSON array items, each one preceded by
+    its separator; see copy_json_array.
+
+    Args:
+        f: A file object opened in binary mode.
+        records (iterable): The dictionaries to write.
+        pretty (bool): Indent the records for reading instead of writing them compactly.
+    """
+    if not pretty:
+        for record in records:
+            f.write(b',' + encode_json(record))
+        return
+    for record in records:
+        # JSON strings never contain raw newlines, so this only re-indents the structure
+        f.write(b',\n    ' + encode_json(record, pretty=True).replace(b'\n', b'\n    '))
+
+def copy_json_array(f, spill_files, pretty=False):
+    """
+    Writes the records held in several spill files to f as a single JSON array
+    nested one level inside the top-level object.
+
+    Args:
+        f: The output file object, opened in binary mode.
+        spill_files (iterable): Binary spill files filled by spill_json_records.
+        pretty (bool): Whether the records were spilled indented.
+    """
+    f.write(b'[')
+    wrote_record = False
+    for spill_file in spill_files:
+        spill_file.seek(0)
+        # Drop the separator in front of the array's first record
+        if not wrote_record and spill_file.read(1):
+            wrote_record = True
+        shutil.copyfileobj(spill_file, f)
+    if wrote_record and pretty:
+        f.write(b'\n  ')
+    f.write(b']')
+
+def stream_pubmed_data(json_data, output_dir_nodes, output_dir_rels, output_dir_json, chunk_size=1000, pretty=False, workers=1):
+    """
+    Builds the knowledge graph chunk by chunk and writes each chunk to the node
+    and relationship CSV files and the JSON file as soon as it is processed, so
+    only the IDs of the nodes already written are kept in memory.
+
+    Args:
+        json_data (iterable): (pmid, paper_data) pairs, e.g. from iter_pubmed_articles.
+        output_dir_nodes (str): The directory path to save the node CSV files.
+        output_dir_rels (str): The directory path to save the relationship CSV files.
+        output_dir_json (str): The directory path to save the JSON file.
+        chunk_size (int): Number of papers processed between writes.
+        pretty (bool): Write indented JSON for reading instead of compact JSON.
+        workers (int): Number of processes converting chunks in parallel.
+
+    Returns:
+        tuple: Two dictionaries with the number of nodes per node type and the
+               number of relationships per relationship type.
+    """
+    seen_node_ids = {node_type: set() for node_type in NODE_SCHEMAS}
+    node_counts = dict.fromkeys(NODE_SCHEMAS, 0)
+    rel_counts = dict.fromkeys(REL_SCHEMAS, 0)
+    # Pull the node columns out of the node dictionaries in header order
+    node_columns = {node_type: operator.itemgetter(*headers) for node_type, headers in NODE_SCHEMAS.items()}
+
+    with contextlib.ExitStack() as stack:
+        def open_csv(file_path, headers):
+            f = stack.enter_context(open(file_path, 'w', newline='', encoding='utf-8', buffering=WRITE_BUFFER_SIZE))
+            writer = csv.writer(f)
+            writer.writerow(headers)
+            return writer
+
+        def write_relationships(rel_type, rel_rows):
+            # Relationship rows are already tuples in header order
+            rel_counts[rel_type] += len(rel_rows)
+            writer = rel_writers.get(rel_type)
+            if writer is None:
+                file_path = os.path.join(output_dir_rels, f'{rel_type.lower()}_rels.csv')
+                writer = rel_writers[rel_type] = open_csv(file_path, REL_SCHEMAS[rel_type])
+            writer.writerows(rel_rows)
+            headers = REL_SCHEMAS[rel_type]
+            # The JSON record is the only place a relationship becomes a dictionary;
+            # all but CITES/CITED_BY are plain (startNode, endNode) pairs
+            if len(headers) == 2:
+                records = ({'type': rel_type, 'startNode': start_node, 'endNode': end_node} for start_node, end_node in rel_rows)
+            else:
+                records = ({'type': rel_type, **dict(zip(headers, rel_row))} for rel_row in rel_rows)
+            spill_json_records(rel_spills[rel_type], records, pretty)
+
+        # CSV files are opened on their first row, so types without any rows get no file
+        node_writers = {}
+        rel_writers = {}
+        # JSON records are spilled per type and stitched together in type order at the end
+        node_spills = {node_type: stack.enter_context(tempfile.TemporaryFile(dir=output_dir_json, buffering=WRITE_BUFFER_SIZE)) for node_type in NODE_SCHEMAS}
+        rel_spills = {rel_type: stack.enter_context(tempfile.TemporaryFile(dir=output_dir_json, buffering=WRITE_BUFFER_SIZE)) for rel_type in REL_SCHEMAS}
+
+        for nodes, relationships in iter_processed_chunks(json_data, chunk_size, workers):
+
+            for node_type, node_dict in nodes.items():
+                seen = seen_node_ids[node_type]
+                new_nodes = [node_data for node_id, node_data in node_dict.items() if node_id not in seen]
+                if not new_nodes:
+                    continue
+                seen.update(node_data['id'] for node_data in new_nodes)
+                node_counts[node_type] += len(new_nodes)
+                writer = node_writers.get(node_type)
+                if writer is None:
+                    file_path = os.path.join(output_dir_nodes, f'{node_type.lower()}_nodes.csv')
+                    writer = node_writers[node_type] = open_csv(file_path, NODE_SCHEMAS[node_type])
+                writer.writerows(map(node_columns[node_type], new_nodes))
+                # Node dictionaries are already tagged with their 'type', so they are written as is
+                spill_json_records(node_spills[node_type], new_nodes, pretty)
+
+            for rel_type, rel_list in relationships.items():
+                if not rel_list:
+                    continue
+                write_relationships(rel_type, rel_list)
+                write_relationships(
+                    INVERSE_RELATIONSHIPS[rel_type],
+                    [(end_node, start_node, *properties) for start_node, end_node, *properties in rel_list]
+                )
+
+        output_file_path = os.path.join(output_dir_json, "pubmed_knowledge_graph.json")
+        with open(output_file_path, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+            f.write(b'{\n  "nodes": ' if pretty else b'{"nodes":')
+            copy_json_array(f, node_spills.values(), pretty)
+            f.write(b',\n  "relationships": ' if pretty else b',"relationships":')
+            copy_json_array(f, rel_spills.values(), pretty)
+            f.write(b'\n}' if pretty else b'}')
+
+    return node_counts, rel_counts
 
 def main():
     """
@@ -335,6 +520,10 @@ def main():
     csv_nodes_dir = os.path.join(csv_dir, "nodes")
     csv_rels_dir = os.path.join(csv_dir, "relationships")
     input_file_path = "/Users/gopinath.balu/Workspace/agentic_ai_innovations/intermediate_parsed/pubmed_articles.json"
+    # The JSON file is written compactly; set this for an indented, human-readable file
+    pretty_json = False
+    # Papers are converted in chunks across all available cores
+    workers = os.cpu_count() or 1
     
     for directory in [json_dir, csv_nodes_dir, csv_rels_dir]:
         os.makedirs(directory, exist_ok=True)
@@ -343,44 +532,36 @@ def main():
         print(f"Error: Input file not found at {input_file_path}")
         return
     
+    # Convert the articles as they are read, writing the JSON and CSV files on the way
     try:
-        with open(input_file_path, 'r', encoding='utf-8') as file:
-            json_data = json.load(file)
-    except json.JSONDecodeError:
+        with open(input_file_path, 'rb') as file:
+            node_counts, rel_counts = stream_pubmed_data(iter_pubmed_articles(file), csv_nodes_dir, csv_rels_dir, json_dir, pretty=pretty_json, workers=workers)
+    except JSON_DECODE_ERRORS:
         print(f"Error: Could not parse JSON from {input_file_path}")
         return
-    except Exception as e:
+    except OSError as e:
         print(f"Error reading file: {str(e)}")
         return
     
     print(f"Successfully loaded data from {input_file_path}")
-    print(f"Number of articles loaded: {len(json_data)}")
-    
-    nodes, relationships = process_pubmed_data(json_data)
+    print(f"Number of articles loaded: {node_counts['Paper']}")
     
-    total_nodes = sum(len(d) for d in nodes.values())
-    total_relationships = sum(len(d) for d in relationships.values())
+    total_nodes = sum(node_counts.values())
+    total_relationships = sum(rel_counts.values())
 
     print("\n--- Knowledge Graph Summary ---")
     print(f"Total number of nodes: {total_nodes}")
     print(f"Total number of relationships: {total_relationships}")
     
-    node_counts = {node_type: len(node_dict) for node_type, node_dict in nodes.items()}
-    
     print("\n--- Node Distribution ---")
     for node_type, count in node_counts.items():
         print(f"{node_type}: {count} nodes")
     
-    rel_counts = {rel_type: len(rel_list) for rel_type, rel_list in relationships.items()}
-    
     print("\n--- Relationship Distribution ---")
     for rel_type, count in rel_counts.items():
         print(f"{rel_type}: {count} relationships")
     
-    write_json_files(nodes, relationships, json_dir)
     print(f"\nKnowledge graph saved to JSON file at: {os.path.join(json_dir, 'pubmed_knowledge_graph.json')}")
-
-    write_csv_files(nodes, relationships, csv_nodes_dir, csv_rels_dir)
     print(f"Knowledge graph data saved to CSV files in: {csv_dir}")
     
     print("\nKnowledge Graph generation completed successfully.")
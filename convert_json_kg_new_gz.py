@@ -1,15 +1,92 @@
 import os
+import io
 import json
 import csv
+import re
 import hashlib
 import gzip
 import time  # Import time module for timing
 from tqdm import tqdm  # Import tqdm for progress tracking
 import multiprocessing as mp
 import glob
+import shutil
 import argparse
-from functools import partial
+import contextlib
+from functools import lru_cache, partial
 
+# orjson is optional; fall back to the standard library when it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# python-isal is optional; its igzip reader is a drop-in for gzip that decompresses
+# with ISA-L, several times faster than zlib
+try:
+    from isal import igzip
+except ImportError:
+    igzip = None
+
+gzip_open = gzip.open if igzip is None else igzip.open
+
+# rapidgzip is optional; it decompresses a single gzip file on several threads,
+# which uses the cores the file-level pool leaves idle
+try:
+    import rapidgzip
+except ImportError:
+    rapidgzip = None
+
+# pyarrow is optional; it is only needed for --format parquet
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# ijson is optional; without it the whole input file is parsed up front
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Both parsers accept the raw bytes, so the decompressed input is never decoded
+# to a str first; orjson.JSONDecodeError subclasses json.JSONDecodeError
+json_loads = json.loads if orjson is None else orjson.loads
+
+JSON_DECODE_ERRORS = (json.JSONDecodeError,) if ijson is None else (json.JSONDecodeError, ijson.JSONError)
+
+# Column order of each node type; nodes are stored as tuples in this order and
+# the same tuple doubles as the CSV header
+NODE_SCHEMAS = {
+    'Paper': ('id', 'pmid', 'title', 'abstract', 'year'),
+    'Author': ('id', 'name'),
+    'MeshTerm': ('id', 'name', 'mesh_id'),
+    'PublicationType': ('id', 'name', 'publication_type_id'),
+    'Chemical': ('id', 'name', 'chemical_id'),
+    'Keyword': ('id', 'name', 'keyword_id'),
+    'Grant': ('id', 'grant_id', 'agency', 'country'),
+    'Journal': ('id', 'name', 'journal_id', 'nlm_unique_id', 'issn', 'issn_type'),
+    'Country': ('id', 'name', 'country_id')
+}
+
+# Relationships are stored as (startNode, endNode) tuples; this is their CSV header
+REL_HEADERS = ('startNode', 'endNode')
+
+# Characters that make csv.writer quote a field; relationship rows are formatted
+# by hand and must match its output
+CSV_SPECIAL_CHARS = re.compile(r'[",\r\n]')
+
+# Buffer size for the CSV output files, so millions of short rows reach the disk
+# in few writes
+WRITE_BUFFER_SIZE = 1 << 20
+
+# When relationships are streamed out, they are handed to the writer after this many papers
+RELATIONSHIP_FLUSH_PAPERS = 10000
+
+# Author, keyword, journal and country names repeat heavily across papers, so hashed
+# IDs are memoised; the bound keeps memory flat on full baseline batches
+@lru_cache(maxsize=1 << 20)
 def generate_deterministic_id(text):
     """
     Generates a consistent, unique ID for entities without a standard ID
@@ -17,63 +94,46 @@ def generate_deterministic_id(text):
     """
     if not text:
         return None
-    # Use a secure hash to create a short, consistent identifier
+    # Use a secure hash to create a short, consistent identifier. These IDs must match
+    # the ones convert_json_kg_new.py produces, so switching the hash would break joins
     return hashlib.sha1(text.encode('utf-8')).hexdigest()[:10]
 
-def sanitize_keys(data):
+def iter_pubmed_articles(file):
     """
-    Recursively sanitize dictionary keys by replacing any whitespace with underscore.
-    Works with nested dictionaries and lists containing dictionaries.
+    Yields (pmid, article data) pairs from a PubMed JSON file opened in binary mode.
+    Papers are streamed one at a time with ijson when it is installed, so the
+    full input never has to be held in memory.
     
     Args:
-        data: Dictionary, list, or any other data structure to sanitize
-        
-    Returns:
-        The sanitized data structure with whitespace in keys replaced by underscores
-    """
-    if isinstance(data, dict):
-        # Create a new dictionary with sanitized keys
-        sanitized_dict = {}
-        for key, value in data.items():
-            # Replace whitespace with underscore in the key
-            sanitized_key = key.replace(" ", "_") if isinstance(key, str) else key
-            # Recursively sanitize the value
-            sanitized_dict[sanitized_key] = sanitize_keys(value)
-        return sanitized_dict
-    elif isinstance(data, list):
-        # Recursively sanitize each item in the list
-        return [sanitize_keys(item) for item in data]
+        file: A binary file object containing a JSON object keyed by PMID
+    """
+    if ijson is not None:
+        yield from ijson.kvitems(file, '', use_float=True)
     else:
-        # Return primitive values as is
-        return data
+        yield from json_loads(file.read()).items()
 
-def process_pubmed_data(json_data):
+def process_pubmed_data(json_data, flush_relationships=None):
     """
     Process the PubMed JSON data to build a knowledge graph.
     
     Args:
-        json_data: Dictionary of PMID -> article data
+        json_data: Iterable of (PMID, article data) pairs, e.g. from
+            iter_pubmed_articles or dict.items() of the input JSON
+        flush_relationships: Optional callable taking the relationships dict; when
+            given it is called every RELATIONSHIP_FLUSH_PAPERS papers and once at the
+            end, and is expected to write out and clear each list, so only the nodes
+            are held for the whole file
     
     Returns:
         Tuple of (nodes, relationships) where:
-        - nodes is a dict of node_type -> node_id -> node_data
-        - relationships is a dict of rel_type -> list of relationships
+        - nodes is a dict of node_type -> node_id -> node tuple in NODE_SCHEMAS order
+        - relationships is a dict of rel_type -> list of (startNode, endNode) tuples
     """
     # Start timing the core processing
-    core_start = time.time()
+    core_start = time.perf_counter()
     
     # Initialize dictionaries to store nodes and relationships
-    nodes = {
-        'Paper': {},
-        'Author': {},
-        'MeshTerm': {},
-        'PublicationType': {},
-        'Chemical': {},
-        'Keyword': {},
-        'Grant': {},
-        'Journal': {},
-        'Country': {}
-    }
+    nodes = {node_type: {} for node_type in NODE_SCHEMAS}
     
     # Define relationship types
     relationships = {
@@ -88,151 +148,163 @@ def process_pubmed_data(json_data):
         'CITES': []
     }
     
+    # Node IDs already built from a raw name or ID:Name entry, so an entity seen
+    # before costs one lookup instead of a hash or split and an f-string; a hit
+    # also means the node exists
+    author_ids = {}
+    mesh_ids = {}
+    pub_type_ids = {}
+    chem_ids = {}
+    keyword_ids = {}
+    journal_ids = {}
+    country_ids = {}
+    
+    malformed_chemicals = 0
+    
+    # Timed per file and per flush only; a clock read per paper costs more than it tells
     sub_timings = {
-        'nodes_creation': 0,
-        'relationships_creation': 0,
+        'relationships_writing': 0,
         'papers_processing': 0
     }
     
+    # Bind each node dict and relationship list's append once; they are used for
+    # every entity and relationship created
+    paper_nodes = nodes['Paper']
+    author_nodes = nodes['Author']
+    mesh_nodes = nodes['MeshTerm']
+    pub_type_nodes = nodes['PublicationType']
+    chem_nodes = nodes['Chemical']
+    keyword_nodes = nodes['Keyword']
+    grant_nodes = nodes['Grant']
+    journal_nodes = nodes['Journal']
+    country_nodes = nodes['Country']
+    add_authored = relationships['AUTHORED'].append
+    add_has_mesh_term = relationships['HAS_MESH_TERM'].append
+    add_has_publication_type = relationships['HAS_PUBLICATION_TYPE'].append
+    add_contains_chemical = relationships['CONTAINS_CHEMICAL'].append
+    add_has_keyword = relationships['HAS_KEYWORD'].append
+    add_funded_by = relationships['FUNDED_BY'].append
+    add_published_in = relationships['PUBLISHED_IN'].append
+    add_published_from = relationships['PUBLISHED_FROM'].append
+    add_cites = relationships['CITES'].append
+    
     # Process each paper
-    papers_start = time.time()
-    for pmid, paper_data in tqdm(json_data.items(), desc="Processing papers"):
+    papers_start = time.perf_counter()
+    # No per-paper progress bar: workers' bars would interleave with the file-level
+    # one in main, and tqdm's bookkeeping runs for every paper
+    for paper_count, (pmid, paper_data) in enumerate(json_data, 1):
+        # Bind the lookup once; it is used for every field of the paper
+        get = paper_data.get
+        
         # Start by creating the paper node
-        title = paper_data.get('title', '')
+        title = get('title', '')
         
         # If title is a list, join it into a single string
         if isinstance(title, list):
             title = ' '.join(title)
             
-        abstract = paper_data.get('abstract', '')
-        year = paper_data.get('year', '')
+        abstract = get('abstract', '')
+        year = get('year', '')
         
         # Create Paper node with standardized ID
         pmid_id = f"Paper_{pmid}"
-        nodes['Paper'][pmid_id] = {
-            'id': pmid_id,
-            'pmid': pmid,
-            'title': title,
-            'abstract': abstract,
-            'year': year
-        }
+        paper_nodes[pmid_id] = (pmid_id, pmid, title, abstract, year)
         
-        # Start timing relationship creation for this paper
-        rel_start = time.time()
+        # A paper's entity lists can repeat an entry; each is iterated through
+        # dict.fromkeys so the duplicate edge is never built, keeping list order
         
         # Create Author nodes and AUTHORED relationships
-        authors = paper_data.get('authors', [])
-        for author_name in authors:
-            # Use deterministic ID for authors based on name
-            author_id = f"Author_{generate_deterministic_id(author_name)}"
-            
-            # Create Author node if not exists
-            if author_id not in nodes['Author']:
-                nodes['Author'][author_id] = {
-                    'id': author_id,
-                    'name': author_name
-                }
+        authors = get('authors', [])
+        for author_name in dict.fromkeys(authors):
+            author_id = author_ids.get(author_name)
+            if author_id is None:
+                # Use deterministic ID for authors based on name
+                author_id = author_ids[author_name] = f"Author_{generate_deterministic_id(author_name)}"
+                
+                # Create Author node if not exists
+                if author_id not in author_nodes:
+                    author_nodes[author_id] = (author_id, author_name)
             
             # Create AUTHORED relationship
-            relationships['AUTHORED'].append({
-                'startNode': author_id,
-                'endNode': pmid_id
-            })
+            add_authored((author_id, pmid_id))
         
         # Create MeshTerm nodes and HAS_MESH_TERM relationships
-        mesh_terms = paper_data.get('mesh_terms', [])
-        for mesh_with_id in mesh_terms:
-            # Split the MeSH term ID and name (format: "D000001:Term Name")
-            mesh_id, mesh_name = mesh_with_id.split(':', 1)
-            
-            mesh_node_id = f"MeshTerm_{mesh_id}"
-            
-            # Create MeshTerm node if not exists
-            if mesh_node_id not in nodes['MeshTerm']:
-                nodes['MeshTerm'][mesh_node_id] = {
-                    'id': mesh_node_id,
-                    'name': mesh_name,
-                    'mesh_id': mesh_id
-                }
+        mesh_terms = get('mesh_terms', [])
+        for mesh_with_id in dict.fromkeys(mesh_terms):
+            mesh_node_id = mesh_ids.get(mesh_with_id)
+            if mesh_node_id is None:
+                # Split the MeSH term ID and name (format: "D000001:Term Name")
+                mesh_id, sep, mesh_name = mesh_with_id.partition(':')
+                if not sep:
+                    # Skip entries without the ID:Name format
+                    continue
+                
+                mesh_node_id = mesh_ids[mesh_with_id] = f"MeshTerm_{mesh_id}"
+                
+                # Create MeshTerm node if not exists
+                if mesh_node_id not in mesh_nodes:
+                    mesh_nodes[mesh_node_id] = (mesh_node_id, mesh_name, mesh_id)
             
             # Create HAS_MESH_TERM relationship
-            relationships['HAS_MESH_TERM'].append({
-                'startNode': pmid_id,
-                'endNode': mesh_node_id
-            })
+            add_has_mesh_term((pmid_id, mesh_node_id))
         
         # Create PublicationType nodes and HAS_PUBLICATION_TYPE relationships
-        pub_types = paper_data.get('publication_types', [])
-        for pub_type_with_id in pub_types:
-            # Split the publication type ID and name
-            pub_type_id, pub_type_name = pub_type_with_id.split(':', 1)
-            pub_type_node_id = f"PublicationType_{pub_type_id}"
-            
-            # Create PublicationType node if not exists
-            if pub_type_node_id not in nodes['PublicationType']:
-                nodes['PublicationType'][pub_type_node_id] = {
-                    'id': pub_type_node_id,
-                    'name': pub_type_name,
-                    'publication_type_id': pub_type_id
-                }
+        pub_types = get('publication_types', [])
+        for pub_type_with_id in dict.fromkeys(pub_types):
+            pub_type_node_id = pub_type_ids.get(pub_type_with_id)
+            if pub_type_node_id is None:
+                # Split the publication type ID and name
+                pub_type_id, sep, pub_type_name = pub_type_with_id.partition(':')
+                if not sep:
+                    # Skip entries without the ID:Name format
+                    continue
+                pub_type_node_id = pub_type_ids[pub_type_with_id] = f"PublicationType_{pub_type_id}"
+                
+                # Create PublicationType node if not exists
+                if pub_type_node_id not in pub_type_nodes:
+                    pub_type_nodes[pub_type_node_id] = (pub_type_node_id, pub_type_name, pub_type_id)
             
             # Create HAS_PUBLICATION_TYPE relationship
-            relationships['HAS_PUBLICATION_TYPE'].append({
-                'startNode': pmid_id,
-                'endNode': pub_type_node_id
-            })
+            add_has_publication_type((pmid_id, pub_type_node_id))
         
         # --- Create Chemical Nodes and CONTAINS_CHEMICAL relationships ---
-        chemicals = paper_data.get('chemical_list', [])
-        for chem_with_id in chemicals:
-            try:
+        chemicals = get('chemical_list', [])
+        for chem_with_id in dict.fromkeys(chemicals):
+            chem_node_id = chem_ids.get(chem_with_id)
+            if chem_node_id is None:
                 # Only process chemical entries with the standard ID:Name format
-                if ':' in chem_with_id:
-                    # Standard format with ID:Name
-                    chem_id, chem_name = chem_with_id.split(':', 1)
-                    chem_node_id = f"Chemical_{chem_id}"
-                    
-                    # Create the chemical node
-                    nodes['Chemical'][chem_node_id] = {
-                        'id': chem_node_id, 
-                        'name': chem_name, 
-                        'chemical_id': chem_id
-                    }
-                    
-                    # Create the relationship
-                    relationships['CONTAINS_CHEMICAL'].append({
-                        'startNode': pmid_id,
-                        'endNode': chem_node_id
-                    })
-                # Skip entries without the ID:Name format silently
-            except Exception as e:
-                # Log error but continue processing
-                print(f"Error processing chemical for PMID {pmid}: {str(e)}")
-                continue
+                chem_id, sep, chem_name = chem_with_id.partition(':')
+                if not sep:
+                    # Skip entries without the ID:Name format; they are reported once at the end
+                    malformed_chemicals += 1
+                    continue
+                chem_node_id = chem_ids[chem_with_id] = f"Chemical_{chem_id}"
+                
+                # Create the chemical node if not exists
+                if chem_node_id not in chem_nodes:
+                    chem_nodes[chem_node_id] = (chem_node_id, chem_name, chem_id)
+            
+            # Create the relationship
+            add_contains_chemical((pmid_id, chem_node_id))
         
         # --- Create Keyword Nodes and HAS_KEYWORD relationships ---
-        keywords = paper_data.get('keywords', [])
-        for keyword in keywords:
-            # Use deterministic ID for keywords
-            keyword_id = generate_deterministic_id(keyword)
-            keyword_node_id = f"Keyword_{keyword_id}"
-            
-            # Create Keyword node if not exists
-            if keyword_node_id not in nodes['Keyword']:
-                nodes['Keyword'][keyword_node_id] = {
-                    'id': keyword_node_id,
-                    'name': keyword,
-                    'keyword_id': keyword_id
-                }
+        keywords = get('keywords', [])
+        for keyword in dict.fromkeys(keywords):
+            keyword_node_id = keyword_ids.get(keyword)
+            if keyword_node_id is None:
+                # Use deterministic ID for keywords
+                keyword_id = generate_deterministic_id(keyword)
+                keyword_node_id = keyword_ids[keyword] = f"Keyword_{keyword_id}"
+                
+                # Create Keyword node if not exists
+                if keyword_node_id not in keyword_nodes:
+                    keyword_nodes[keyword_node_id] = (keyword_node_id, keyword, keyword_id)
             
             # Create HAS_KEYWORD relationship
-            relationships['HAS_KEYWORD'].append({
-                'startNode': pmid_id,
-                'endNode': keyword_node_id
-            })
+            add_has_keyword((pmid_id, keyword_node_id))
         
         # --- Create Grant Nodes and FUNDED_BY relationships ---
-        grants = paper_data.get('grant_ids', [])
+        grants = get('grant_ids', [])
         for grant_info in grants:
             # Check if grant_info is a dictionary with required fields
             if isinstance(grant_info, dict) and 'id' in grant_info:
@@ -240,38 +312,38 @@ def process_pubmed_data(json_data):
                 # Generate a node ID for this grant
                 grant_node_id = f"Grant_{grant_id}"
                 
-                # Create Grant node
-                nodes['Grant'][grant_node_id] = {
-                    'id': grant_node_id,
-                    'grant_id': grant_id,
-                    'agency': grant_info.get('agency', ''),
-                    'country': grant_info.get('country', '')
-                }
+                # Create Grant node if not exists
+                if grant_node_id not in grant_nodes:
+                    grant_nodes[grant_node_id] = (
+                        grant_node_id,
+                        grant_id,
+                        grant_info.get('agency', ''),
+                        grant_info.get('country', '')
+                    )
                 
                 # Create FUNDED_BY relationship
-                relationships['FUNDED_BY'].append({
-                    'startNode': pmid_id,
-                    'endNode': grant_node_id
-                })
+                add_funded_by((pmid_id, grant_node_id))
         
         # --- Create Journal Node and PUBLISHED_IN relationship ---
-        journal_data = paper_data.get('journal', {})
+        journal_data = get('journal', {})
         
         # Handle journal data which can be either a string or a dictionary
         if isinstance(journal_data, str):
             # If it's just a string, use it as the journal name
             journal_name = journal_data
-            journal_id = generate_deterministic_id(journal_name)
-            journal_node_id = f"Journal_{journal_id}"
-            
-            # Create Journal node
-            if journal_node_id not in nodes['Journal']:
-                nodes['Journal'][journal_node_id] = {
-                    'id': journal_node_id,
-                    'name': journal_name,
-                    'journal_id': journal_id,
-                    'nlm_unique_id': ''
-                }
+            journal_node_id = journal_ids.get(journal_name)
+            if journal_node_id is None:
+                journal_id = generate_deterministic_id(journal_name)
+                journal_node_id = journal_ids[journal_name] = f"Journal_{journal_id}"
+                
+                # Create Journal node
+                if journal_node_id not in journal_nodes:
+                    journal_nodes[journal_node_id] = (
+                        journal_node_id,
+                        journal_name,
+                        journal_id,
+                        '', '', ''  # No nlm_unique_id, issn or issn_type for a bare name
+                    )
         else:
             # If it's a dictionary, extract relevant fields
             journal_name = journal_data.get('title', '')
@@ -282,105 +354,148 @@ def process_pubmed_data(json_data):
             journal_node_id = f"Journal_{journal_id}"
             
             # Create Journal node
-            if journal_node_id not in nodes['Journal']:
-                nodes['Journal'][journal_node_id] = {
-                    'id': journal_node_id,
-                    'name': journal_name,
-                    'journal_id': journal_id,
-                    'nlm_unique_id': nlm_id,
-                    'issn': journal_data.get('issn', ''),
-                    'issn_type': journal_data.get('issn_type', '')
-                }
+            if journal_node_id not in journal_nodes:
+                journal_nodes[journal_node_id] = (
+                    journal_node_id,
+                    journal_name,
+                    journal_id,
+                    nlm_id,
+                    journal_data.get('issn', ''),
+                    journal_data.get('issn_type', '')
+                )
         
         # Create PUBLISHED_IN relationship
         if journal_node_id:
-            relationships['PUBLISHED_IN'].append({
-                'startNode': pmid_id,
-                'endNode': journal_node_id
-            })
+            add_published_in((pmid_id, journal_node_id))
         
         # --- Create Country Node and PUBLISHED_FROM relationship ---
-        country = paper_data.get('country', '')
+        country = get('country', '')
         if country:
-            country_id = generate_deterministic_id(country)
-            country_node_id = f"Country_{country_id}"
-            
-            # Create Country node
-            if country_node_id not in nodes['Country']:
-                nodes['Country'][country_node_id] = {
-                    'id': country_node_id,
-                    'name': country,
-                    'country_id': country_id
-                }
+            country_node_id = country_ids.get(country)
+            if country_node_id is None:
+                country_id = generate_deterministic_id(country)
+                country_node_id = country_ids[country] = f"Country_{country_id}"
+                
+                # Create Country node
+                if country_node_id not in country_nodes:
+                    country_nodes[country_node_id] = (country_node_id, country, country_id)
             
             # Create PUBLISHED_FROM relationship
-            relationships['PUBLISHED_FROM'].append({
-                'startNode': pmid_id,
-                'endNode': country_node_id
-            })
+            add_published_from((pmid_id, country_node_id))
         
         # --- Create CITES relationships ---
-        references = paper_data.get('references', [])
-        for ref_pmid in references:
-            # Only create relationship if the referenced paper is in our dataset
-            ref_pmid_id = f"Paper_{ref_pmid}"
-            
+        references = get('references', [])
+        # Cited papers are usually in other baseline files, so the edge is kept even
+        # when the target is not in this one; a reference repeated within the paper
+        # is only written once
+        for ref_pmid_id in dict.fromkeys([f"Paper_{ref_pmid}" for ref_pmid in references]):
             # Create CITES relationship
-            relationships['CITES'].append({
-                'startNode': pmid_id,
-                'endNode': ref_pmid_id
-            })
+            add_cites((pmid_id, ref_pmid_id))
         
-        sub_timings['relationships_creation'] += time.time() - rel_start
+        if flush_relationships is not None and paper_count % RELATIONSHIP_FLUSH_PAPERS == 0:
+            flush_start = time.perf_counter()
+            flush_relationships(relationships)
+            sub_timings['relationships_writing'] += time.perf_counter() - flush_start
     
-    sub_timings['papers_processing'] = time.time() - papers_start
-    core_time = time.time() - core_start
+    if flush_relationships is not None:
+        flush_start = time.perf_counter()
+        flush_relationships(relationships)
+        sub_timings['relationships_writing'] += time.perf_counter() - flush_start
+    
+    sub_timings['papers_processing'] = time.perf_counter() - papers_start
+    core_time = time.perf_counter() - core_start
     
     # Print sub-timings
     print("\n--- Processing Time Breakdown ---")
     print(f"Total papers processing time: {sub_timings['papers_processing']:.2f} seconds")
-    print(f"Relationship creation time:   {sub_timings['relationships_creation']:.2f} seconds ({(sub_timings['relationships_creation']/core_time)*100:.2f}% of core processing)")
+    print(f"Relationship writing time:    {sub_timings['relationships_writing']:.2f} seconds ({(sub_timings['relationships_writing']/core_time)*100:.2f}% of core processing)")
+    
+    if malformed_chemicals:
+        print(f"Skipped {malformed_chemicals} chemical entries without the ID:Name format")
     
     return nodes, relationships
 
-def process_pubmed_file(file_path, desc=None):
+def open_gzip_input(file_path, decompress_threads=1):
+    """
+    Opens a gzipped input file for binary reading, with rapidgzip when more than
+    one decompression thread is allowed and it is installed, else with gzip_open.
+    """
+    if rapidgzip is not None and decompress_threads > 1:
+        return rapidgzip.open(file_path, parallelization=decompress_threads)
+    return gzip_open(file_path, 'rb')
+
+def process_pubmed_file(file_path, desc=None, flush_relationships=None, decompress_threads=1):
     """
     Process a single PubMed JSON file.
     
     Args:
         file_path: Path to the gzipped JSON file to process
         desc: Description for the tqdm progress bar
+        flush_relationships: Passed through to process_pubmed_data
+        decompress_threads: Number of threads the file may be decompressed on
     
     Returns:
         Tuple of (nodes, relationships) from the processed file
     """
     print(f"Processing file: {file_path}")
     try:
-        with gzip.open(file_path, 'rt', encoding='utf-8') as file:
-            json_data = json.load(file)
-    except json.JSONDecodeError:
+        # Process the data as it is read; a parse error can therefore surface
+        # after some papers were already processed
+        with open_gzip_input(file_path, decompress_threads) as file:
+            result = process_pubmed_data(iter_pubmed_articles(file), flush_relationships)
+    except JSON_DECODE_ERRORS:
         print(f"Error: Could not parse JSON from {file_path}")
         return None
-    except Exception as e:
+    except OSError as e:
         print(f"Error reading file {file_path}: {str(e)}")
         return None
     
-    print(f"Successfully loaded data from {file_path}")
-    print(f"Number of articles loaded: {len(json_data)}")
+    print(f"Successfully processed data from {file_path}")
+    print(f"Number of articles processed: {len(result[0]['Paper'])}")
     
-    # Process the data
-    return process_pubmed_data(json_data)
+    return result
+
+def csv_quote(field):
+    """
+    Quotes a string field the way csv.writer does by default (QUOTE_MINIMAL).
+    """
+    if CSV_SPECIAL_CHARS.search(field):
+        return '"' + field.replace('"', '""') + '"'
+    return field
 
-def write_csv_files_for_file(nodes, relationships, output_dir_nodes, output_dir_rels, file_id):
+def iter_relationship_csv_lines(rel_list):
+    """
+    Yields each (startNode, endNode) pair as a CSV line, byte-identical to
+    csv.writer's output. Both fields are always strings, so this skips the
+    writer's per-field type dispatch; node rows still go through csv.writer.
+    """
+    quote = csv_quote
+    return (f"{quote(start)},{quote(end)}\r\n" for start, end in rel_list)
+
+def open_csv_output(output_path, compress=False):
+    """
+    Opens a CSV output file for writing. With compress the file is written through
+    gzip (isal when installed) at compression level 1, which already shrinks the
+    repetitive IDs several times over, and gets a '.gz' suffix.
+    """
+    if compress:
+        # Buffer in front of the compressor like the plain branch, so deflate is
+        # fed large blocks rather than one call per text write
+        raw = gzip_open(output_path + '.gz', 'wb', compresslevel=1)
+        return io.TextIOWrapper(io.BufferedWriter(raw, buffer_size=WRITE_BUFFER_SIZE), encoding='utf-8', newline='')
+    return open(output_path, 'w', newline='', encoding='utf-8', buffering=WRITE_BUFFER_SIZE)
+
+def write_csv_files_for_file(nodes, relationships, output_dir_nodes, output_dir_rels, file_id, compress=False):
     """
     Writes the provided nodes and relationships data to a set of CSV files for a single processed file.
     
     Args:
-        nodes: Dictionary of node types to node dictionaries
-        relationships: Dictionary of relationship types to lists of relationships
+        nodes: Dictionary of node types to node_id -> node tuple dictionaries
+        relationships: Dictionary of relationship types to lists of (startNode, endNode) tuples
         output_dir_nodes: Directory to write node CSV files
         output_dir_rels: Directory to write relationship CSV files
         file_id: Identifier for the file being processed (used in output filenames)
+        compress: Write gzip-compressed .csv.gz files
     """
     # Create file_id specific directories
     file_nodes_dir = os.path.join(output_dir_nodes, file_id)
@@ -397,15 +512,10 @@ def write_csv_files_for_file(nodes, relationships, output_dir_nodes, output_dir_
             
         output_path = os.path.join(file_nodes_dir, f"{node_type.lower()}_nodes.csv")
         
-        # Extract headers from the first node
-        headers = list(next(iter(node_dict.values())).keys())
-        
-        with open(output_path, 'w', newline='', encoding='utf-8') as file:
-            writer = csv.DictWriter(file, fieldnames=headers)
-            writer.writeheader()
-            
-            for node in node_dict.values():
-                writer.writerow(node)
+        with open_csv_output(output_path, compress) as file:
+            writer = csv.writer(file)
+            writer.writerow(NODE_SCHEMAS[node_type])
+            writer.writerows(node_dict.values())
     
     # Write relationship CSV files
     for rel_type, rel_list in relationships.items():
@@ -414,57 +524,177 @@ def write_csv_files_for_file(nodes, relationships, output_dir_nodes, output_dir_
             
         output_path = os.path.join(file_rels_dir, f"{rel_type.lower()}_relationships.csv")
         
-        # Extract headers from the first relationship
-        if rel_list:
-            headers = list(rel_list[0].keys())
+        with open_csv_output(output_path, compress) as file:
+            file.writelines(iter_relationship_csv_lines((REL_HEADERS,)))
+            file.writelines(iter_relationship_csv_lines(rel_list))
+
+def relationship_csv_flusher(stack, output_dir_rels, rel_counts, compress=False):
+    """
+    Builds a flush_relationships callable that appends buffered relationships to
+    per-type CSV files and empties the buffers.
+    
+    Args:
+        stack: ExitStack that owns the CSV files; each is opened on its first row,
+            so types without relationships get no file
+        output_dir_rels: Directory to write relationship CSV files
+        rel_counts: Dictionary of relationship type -> row count, updated in place
+        compress: Write gzip-compressed .csv.gz files
+    
+    Returns:
+        Function taking the relationships dict of process_pubmed_data
+    """
+    writers = {}
+    
+    def flush_relationships(relationships):
+        for rel_type, rel_list in relationships.items():
+            if not rel_list:
+                continue
+            
+            file = writers.get(rel_type)
+            if file is None:
+                output_path = os.path.join(output_dir_rels, f"{rel_type.lower()}_relationships.csv")
+                file = writers[rel_type] = stack.enter_context(open_csv_output(output_path, compress))
+                file.writelines(iter_relationship_csv_lines((REL_HEADERS,)))
+            
+            file.writelines(iter_relationship_csv_lines(rel_list))
+            rel_counts[rel_type] = rel_counts.get(rel_type, 0) + len(rel_list)
+            rel_list.clear()
+    
+    return flush_relationships
+
+def parquet_string_column(values):
+    """
+    Builds a string Arrow array, converting non-string values the way the CSV
+    writer would (None stays null).
+    """
+    return pa.array([v if v is None or isinstance(v, str) else str(v) for v in values], type=pa.string())
+
+def write_parquet_files_for_file(nodes, output_dir_nodes, file_id):
+    """
+    Writes the provided nodes to a set of ZSTD-compressed Parquet files for a single processed file.
+    
+    Args:
+        nodes: Dictionary of node types to node_id -> node tuple dictionaries
+        output_dir_nodes: Directory to write node Parquet files
+        file_id: Identifier for the file being processed (used in output filenames)
+    """
+    file_nodes_dir = os.path.join(output_dir_nodes, file_id)
+    os.makedirs(file_nodes_dir, exist_ok=True)
+    
+    for node_type, node_dict in nodes.items():
+        if not node_dict:
+            continue
+        
+        output_path = os.path.join(file_nodes_dir, f"{node_type.lower()}_nodes.parquet")
+        
+        # Transpose the node tuples into one column per NODE_SCHEMAS field
+        columns = [parquet_string_column(column) for column in zip(*node_dict.values())]
+        table = pa.Table.from_arrays(columns, names=list(NODE_SCHEMAS[node_type]))
+        pq.write_table(table, output_path, compression='zstd')
+
+def relationship_parquet_flusher(stack, output_dir_rels, rel_counts):
+    """
+    Builds a flush_relationships callable that appends buffered relationships to
+    per-type Parquet files, one row group per flush, and empties the buffers.
+    
+    Args:
+        stack: ExitStack that owns the Parquet writers; each is opened on its first
+            row, so types without relationships get no file
+        output_dir_rels: Directory to write relationship Parquet files
+        rel_counts: Dictionary of relationship type -> row count, updated in place
+    
+    Returns:
+        Function taking the relationships dict of process_pubmed_data
+    """
+    schema = pa.schema([(name, pa.string()) for name in REL_HEADERS])
+    writers = {}
+    
+    def flush_relationships(relationships):
+        for rel_type, rel_list in relationships.items():
+            if not rel_list:
+                continue
             
-            with open(output_path, 'w', newline='', encoding='utf-8') as file:
-                writer = csv.DictWriter(file, fieldnames=headers)
-                writer.writeheader()
-                
-                for rel in rel_list:
-                    writer.writerow(rel)
+            writer = writers.get(rel_type)
+            if writer is None:
+                output_path = os.path.join(output_dir_rels, f"{rel_type.lower()}_relationships.parquet")
+                writer = writers[rel_type] = stack.enter_context(pq.ParquetWriter(output_path, schema, compression='zstd'))
+            
+            columns = [parquet_string_column(column) for column in zip(*rel_list)]
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+            rel_counts[rel_type] = rel_counts.get(rel_type, 0) + len(rel_list)
+            rel_list.clear()
+    
+    return flush_relationships
 
-def process_and_save_file(file_path, output_dirs):
+def process_and_save_file(file_path, output_dirs, output_format='csv', compress_csv=False, decompress_threads=1):
     """
     Process a single PubMed file and save its results directly.
     
+    This runs in a pool worker and only the returned statistics are pickled back
+    to the parent; the nodes and relationships must never be returned, or the
+    whole graph would be serialised through the pool's result pipe.
+    
     Args:
         file_path: Path to the gzipped JSON file to process
         output_dirs: Dictionary containing output directories
+        output_format: 'csv' or 'parquet'
+        compress_csv: Write the CSV files gzip-compressed
+        decompress_threads: Number of threads the input may be decompressed on
         
     Returns:
         Dict with statistics about the processed file
     """
     file_name = os.path.basename(file_path)
     file_id = os.path.splitext(os.path.splitext(file_name)[0])[0]  # Remove both .json and .gz extensions
+    # Relationships are written out while the file is processed, so only
+    # the nodes are left to save afterwards. If anything fails, this directory
+    # is removed so no partial relationship files point at unwritten nodes.
+    file_rels_dir = os.path.join(output_dirs[f'{output_format}_rels_dir'], file_id)
     
     try:
-        # Process the file
-        result = process_pubmed_file(file_path)
+        os.makedirs(file_rels_dir, exist_ok=True)
+        rel_counts = {}
+        
+        with contextlib.ExitStack() as stack:
+            if output_format == 'parquet':
+                flush_relationships = relationship_parquet_flusher(stack, file_rels_dir, rel_counts)
+            else:
+                flush_relationships = relationship_csv_flusher(stack, file_rels_dir, rel_counts, compress_csv)
+            
+            # Process the file
+            result = process_pubmed_file(
+                file_path,
+                flush_relationships=flush_relationships,
+                decompress_threads=decompress_threads
+            )
         
         if result is None:
             print(f"Error processing file {file_path}")
+            shutil.rmtree(file_rels_dir, ignore_errors=True)
             return None
             
         nodes, relationships = result
         
         # Generate statistics for this file
         file_node_count = sum(len(d) for d in nodes.values())
-        file_rel_count = sum(len(d) for d in relationships.values())
+        file_rel_count = sum(rel_counts.values())
         
         print(f"\nFile {file_id} processed: {file_node_count} nodes, {file_rel_count} relationships")
         
-        # Save results for this file
-        write_csv_files_for_file(
-            nodes, 
-            relationships, 
-            output_dirs['csv_nodes_dir'], 
-            output_dirs['csv_rels_dir'],
-            file_id
-        )
+        # Save the nodes for this file; the relationship lists are empty by now
+        if output_format == 'parquet':
+            write_parquet_files_for_file(nodes, output_dirs['parquet_nodes_dir'], file_id)
+        else:
+            write_csv_files_for_file(
+                nodes, 
+                relationships, 
+                output_dirs['csv_nodes_dir'], 
+                output_dirs['csv_rels_dir'],
+                file_id,
+                compress_csv
+            )
         
-        print(f"Data for {file_id} saved to CSV files")
+        print(f"Data for {file_id} saved to {output_format.upper()} files")
         
         # Return statistics
         return {
@@ -472,11 +702,12 @@ def process_and_save_file(file_path, output_dirs):
             'node_count': file_node_count,
             'rel_count': file_rel_count,
             'node_types': {node_type: len(nodes[node_type]) for node_type in nodes},
-            'rel_types': {rel_type: len(relationships[rel_type]) for rel_type in relationships}
+            'rel_types': {rel_type: rel_counts.get(rel_type, 0) for rel_type in relationships}
         }
         
     except Exception as e:
         print(f"Error processing file {file_path}: {str(e)}")
+        shutil.rmtree(file_rels_dir, ignore_errors=True)
         return None
 
 def merge_data(results):
@@ -490,17 +721,7 @@ def merge_data(results):
         Tuple of merged (nodes, relationships)
     """
     # Initialize the merged dictionaries
-    merged_nodes = {
-        'Paper': {},
-        'Author': {},
-        'MeshTerm': {},
-        'PublicationType': {},
-        'Chemical': {},
-        'Keyword': {},
-        'Grant': {},
-        'Journal': {},
-        'Country': {}
-    }
+    merged_nodes = {node_type: {} for node_type in NODE_SCHEMAS}
     
     merged_relationships = {
         'AUTHORED': [],
@@ -529,31 +750,47 @@ def merge_data(results):
     
     return merged_nodes, merged_relationships
 
+def encode_json(data):
+    """
+    Serialises data to compact UTF-8 JSON bytes, using orjson when it is installed.
+    The standard library fallback is configured to produce the same bytes.
+    """
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
 def write_json_files(nodes, relationships, output_dir):
     """
     Writes the provided nodes and relationships data to a JSON file.
     """
     print("Converting node dictionaries to lists...")
     # Convert node dictionaries to lists
-    nodes_lists = {node_type: list(node_dict.values()) for node_type, node_dict in nodes.items()}
+    nodes_lists = {
+        node_type: [dict(zip(NODE_SCHEMAS[node_type], node)) for node in node_dict.values()]
+        for node_type, node_dict in nodes.items()
+    }
     
     print("Preparing final knowledge graph structure...")
     # Prepare the final knowledge graph structure
     knowledge_graph = {
         'nodes': nodes_lists,
-        'relationships': relationships
+        'relationships': {
+            rel_type: [dict(zip(REL_HEADERS, rel)) for rel in rel_list]
+            for rel_type, rel_list in relationships.items()
+        }
     }
     
     # Write to file
     output_path = os.path.join(output_dir, 'pubmed_knowledge_graph.json')
     print(f"Writing knowledge graph to {output_path}...")
-    with open(output_path, 'w', encoding='utf-8') as file:
-        json.dump(knowledge_graph, file)
+    with open(output_path, 'wb') as file:
+        file.write(encode_json(knowledge_graph))
     print("JSON file writing complete.")
 
-def write_csv_files(nodes, relationships, output_dir_nodes, output_dir_rels):
+def write_csv_files(nodes, relationships, output_dir_nodes, output_dir_rels, compress=False):
     """
-    Writes the provided nodes and relationships data to a set of CSV files.
+    Writes the provided nodes and relationships data to a set of CSV files,
+    gzip-compressed if compress is set.
     """
     # Write node CSV files
     for node_type, node_dict in nodes.items():
@@ -562,15 +799,10 @@ def write_csv_files(nodes, relationships, output_dir_nodes, output_dir_rels):
             
         output_path = os.path.join(output_dir_nodes, f"{node_type.lower()}_nodes.csv")
         
-        # Extract headers from the first node
-        headers = list(next(iter(node_dict.values())).keys())
-        
-        with open(output_path, 'w', newline='', encoding='utf-8') as file:
-            writer = csv.DictWriter(file, fieldnames=headers)
-            writer.writeheader()
-            
-            for node in node_dict.values():
-                writer.writerow(node)
+        with open_csv_output(output_path, compress) as file:
+            writer = csv.writer(file)
+            writer.writerow(NODE_SCHEMAS[node_type])
+            writer.writerows(node_dict.values())
     
     # Write relationship CSV files
     for rel_type, rel_list in relationships.items():
@@ -579,16 +811,9 @@ def write_csv_files(nodes, relationships, output_dir_nodes, output_dir_rels):
             
         output_path = os.path.join(output_dir_rels, f"{rel_type.lower()}_relationships.csv")
         
-        # Extract headers from the first relationship
-        if rel_list:
-            headers = list(rel_list[0].keys())
-            
-            with open(output_path, 'w', newline='', encoding='utf-8') as file:
-                writer = csv.DictWriter(file, fieldnames=headers)
-                writer.writeheader()
-                
-                for rel in rel_list:
-                    writer.writerow(rel)
+        with open_csv_output(output_path, compress) as file:
+            file.writelines(iter_relationship_csv_lines((REL_HEADERS,)))
+            file.writelines(iter_relationship_csv_lines(rel_list))
 
 def main():
     """
@@ -600,27 +825,35 @@ def main():
                         help='Input directory containing gzipped JSON files or path pattern (e.g., "/path/to/files/*.json.gz")')
     parser.add_argument('--output', '-o', type=str, default='/Users/gopinath.balu/Workspace/agentic_ai_innovations/constructed_KG_new',
                         help='Base output directory for processed data')
-    parser.add_argument('--workers', '-w', type=int, default=mp.cpu_count()//2,
+    parser.add_argument('--workers', '-w', type=int, default=max(1, mp.cpu_count()//2),
                         help='Number of worker processes for multiprocessing')
+    parser.add_argument('--format', '-f', choices=['csv', 'parquet'], default='csv',
+                        help='Output format for the node and relationship tables (parquet needs pyarrow)')
+    parser.add_argument('--compress-csv', action='store_true',
+                        help='Write the CSV files gzip-compressed (.csv.gz) at a fast compression level')
     args = parser.parse_args()
     
-    start_time = time.time()
+    if args.format == 'parquet' and pa is None:
+        print("Error: --format parquet requires pyarrow to be installed")
+        return
+    
+    start_time = time.perf_counter()
     
     # Setup output directories
     base_dir = args.output
     json_dir = os.path.join(base_dir, "json")
-    csv_dir = os.path.join(base_dir, "csv")
-    csv_nodes_dir = os.path.join(csv_dir, "nodes")
-    csv_rels_dir = os.path.join(csv_dir, "relationships")
+    table_dir = os.path.join(base_dir, args.format)
+    table_nodes_dir = os.path.join(table_dir, "nodes")
+    table_rels_dir = os.path.join(table_dir, "relationships")
     
-    for directory in [json_dir, csv_nodes_dir, csv_rels_dir]:
+    for directory in [json_dir, table_nodes_dir, table_rels_dir]:
         os.makedirs(directory, exist_ok=True)
     
     # Create output directories dictionary to pass to process_and_save_file
     output_dirs = {
         'json_dir': json_dir,
-        'csv_nodes_dir': csv_nodes_dir,
-        'csv_rels_dir': csv_rels_dir
+        f'{args.format}_nodes_dir': table_nodes_dir,
+        f'{args.format}_rels_dir': table_rels_dir
     }
     
     # Find all input files
@@ -636,13 +869,23 @@ def main():
     
     print(f"Found {len(input_files)} files to process")
     
-    # Set up multiprocessing pool
-    pool = mp.Pool(processes=args.workers)
+    # Hand out the largest files first so a big file picked up last does not
+    # leave the other workers idle while it finishes
+    input_files.sort(key=os.path.getsize, reverse=True)
+    
+    # Cores not taken by a worker process are shared out for decompressing each file
+    decompress_threads = max(1, mp.cpu_count() // args.workers)
+    
+    # Set up multiprocessing pool. The graph-building loop is pure Python and holds
+    # the GIL, so threads would not help; workers are instead recycled every few
+    # files so heap fragmentation and the ID caches cannot grow without bound
+    pool = mp.Pool(processes=args.workers, maxtasksperchild=4)
     
     # Process files in parallel with progress bar, one at a time
     try:
         # Create partial function with fixed output_dirs parameter
-        process_func = partial(process_and_save_file, output_dirs=output_dirs)
+        process_func = partial(process_and_save_file, output_dirs=output_dirs, output_format=args.format,
+                               compress_csv=args.compress_csv, decompress_threads=decompress_threads)
         
         # Process and collect statistics for each file
         file_stats = []
@@ -668,7 +911,7 @@ def main():
     print(f"Total number of relationships across all files: {total_relationships}")
     print(f"Total number of files processed: {len(file_stats)}")
     
-    end_time = time.time()
+    end_time = time.perf_counter()
     print(f"\nTotal processing time: {end_time - start_time:.2f} seconds")
     
     print("\nKnowledge Graph generation completed successfully.")
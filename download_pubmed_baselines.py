@@ -4,15 +4,18 @@ This script connects to the NCBI server via HTTP and downloads all PubMed
 baseline data files (.xml.gz) for a given year to a user-specified 
 local directory.
 
-It dynamically determines the number of files to download by querying the
-FTP server first. It then performs MD5 checksum validation, checks for 
+It dynamically determines the number of files to download by reading the
+server's directory index first. It then performs MD5 checksum validation, checks for 
 existing files, retries failed downloads, and runs a final check to ensure 
 no files are missing from the sequence.
 """
 
 import os
 import sys
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from tqdm import tqdm
 import concurrent.futures
 import hashlib
@@ -20,16 +23,41 @@ import argparse
 
 from list_pubmed_files import count_remote_files
 
-def calculate_md5(filepath, block_size=65536):
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# Every file lives on the same host, so each worker thread keeps one session
+# and reuses its TCP+TLS connection for the .md5 and .xml.gz requests.
+_thread_local = threading.local()
+
+def get_session():
+    """Returns the calling thread's keep-alive requests.Session."""
+    session = getattr(_thread_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        retries = Retry(total=3, connect=3, read=3, backoff_factor=1,
+                        status_forcelist=(500, 502, 503, 504))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=retries)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers['Connection'] = 'keep-alive'
+        _thread_local.session = session
+    return session
+
+def calculate_md5(filepath, block_size=DOWNLOAD_CHUNK_SIZE):
     """Calculates the MD5 hash of a file."""
-    md5 = hashlib.md5()
     try:
         with open(filepath, 'rb') as f:
+            # file_digest (Python 3.11+) hashes in C with the GIL released,
+            # so worker threads can verify existing files in parallel.
+            if hasattr(hashlib, 'file_digest'):
+                return hashlib.file_digest(f, 'md5').hexdigest()
+            md5 = hashlib.md5()
+            buffer = memoryview(bytearray(block_size))
             while True:
-                data = f.read(block_size)
-                if not data:
+                n = f.readinto(buffer)
+                if not n:
                     break
-                md5.update(data)
+                md5.update(buffer[:n])
     except IOError:
         return None
     return md5.hexdigest()
@@ -45,10 +73,12 @@ def verify_and_download_file(filename, download_dir, base_url):
     local_filepath = os.path.join(download_dir, filename)
     url = base_url + filename
     md5_url = url + ".md5"
+    partial_filepath = local_filepath + ".part"
+    session = get_session()
 
     try:
         # --- Get Official MD5 Checksum ---
-        md5_response = requests.get(md5_url, timeout=30)
+        md5_response = session.get(md5_url, timeout=30)
         md5_response.raise_for_status()
         official_hash = md5_response.text.split('=')[1].strip()
 
@@ -62,20 +92,25 @@ def verify_and_download_file(filename, download_dir, base_url):
                 os.remove(local_filepath)
 
         # --- Download the file ---
-        response = requests.get(url, stream=True, timeout=60)
+        response = session.get(url, stream=True, timeout=60)
         response.raise_for_status()
         total_size = int(response.headers.get('content-length', 0))
         
-        with open(local_filepath, 'wb') as file:
-            for data in response.iter_content(chunk_size=8192):
+        # Hash the chunks as they arrive so the file doesn't have to be read back,
+        # and only move it into place once it has been verified.
+        md5 = hashlib.md5()
+        with open(partial_filepath, 'wb') as file:
+            for data in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
                 file.write(data)
+                md5.update(data)
         
         # --- Verify the newly downloaded file ---
-        if os.path.getsize(local_filepath) != total_size:
+        if os.path.getsize(partial_filepath) != total_size:
              raise Exception("Incomplete download (size mismatch)")
 
-        new_local_hash = calculate_md5(local_filepath)
+        new_local_hash = md5.hexdigest()
         if new_local_hash == official_hash:
+            os.replace(partial_filepath, local_filepath)
             return 'success', filename
         else:
             raise Exception(f"MD5 mismatch after download. Expected {official_hash}, got {new_local_hash}")
@@ -84,11 +119,11 @@ def verify_and_download_file(filename, download_dir, base_url):
         if e.response.status_code == 404:
             return 'failed_404', filename # File doesn't exist on server
         tqdm.write(f"HTTP Error processing {filename}: {e}")
-        if os.path.exists(local_filepath): os.remove(local_filepath)
+        if os.path.exists(partial_filepath): os.remove(partial_filepath)
         return 'failed', filename
     except Exception as e:
         tqdm.write(f"Error processing {filename}: {e}")
-        if os.path.exists(local_filepath): os.remove(local_filepath)
+        if os.path.exists(partial_filepath): os.remove(partial_filepath)
         return 'failed', filename
 
 
@@ -104,7 +139,7 @@ def download_all_pubmed_baseline_files(download_dir, year, max_workers, max_retr
         sys.exit(1)
 
     # --- Dynamically determine the number of files to download ---
-    num_files_to_try = count_remote_files(year)
+    num_files_to_try = count_remote_files(year, session=get_session())
     if not num_files_to_try:
         print(f"Could not determine the number of files for year {year}, or no files found. Exiting.")
         sys.exit(1)
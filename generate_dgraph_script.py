@@ -1,11 +1,52 @@
+import functools
 import json
 import os
+import re
 import sys
 
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Node keys that are not written out as properties
+NODE_META_KEYS = frozenset(('id', 'type', 'nodeId'))
+
+# Characters that may appear unescaped in a blank node label
+UNSAFE_LABEL_CHARS = re.compile(r'[^A-Za-z0-9_]')
+
+# N-Quad templates; labels come from blank_node_label and literals are passed
+# in already quoted and escaped
+NODE_HEADER_QUADS = '_:%s <dgraph.type> %s .\n_:%s <nodeId> "%s" .\n'
+PROPERTY_QUAD = '_:%s <%s> %s .\n'
+EDGE_QUAD = '_:%s <%s> _:%s .\n'
+CITATION_EDGE_QUAD = '_:%s <%s> _:%s (citation_text=%s) .\n'
+
+def escape_label_char(match):
+    """Replaces an unsafe character with '-' and the hex of its UTF-8 bytes."""
+    return ''.join('-%02X' % byte for byte in match.group().encode('utf-8'))
+
+def blank_node_label(node_id):
+    """
+    Maps a KG id to a valid N-Quad blank node label. Ids such as 'Paper_123'
+    are returned unchanged; any other character (spaces, slashes and '-' itself
+    in free-text Grant ids, for example) becomes '-XX' per UTF-8 byte, and a
+    leading '_' is prepended when the id does not start with [A-Za-z0-9], so
+    the mapping is reversible and never produces an invalid label.
+
+    Args:
+        node_id (str): The node id from the KG.
+
+    Returns:
+        str: The label, without the '_:' prefix.
+    """
+    node_id = str(node_id)
+    label = UNSAFE_LABEL_CHARS.sub(escape_label_char, node_id)
+    if not node_id or not node_id[0].isascii() or not node_id[0].isalnum():
+        label = '_' + label
+    return label
+
 def generate_dgraph_schema_and_mutations(input_json_path, output_dir):
     """
     Reads a knowledge graph from a JSON file, generates a Dgraph schema,
-    and creates a series of Dgraph mutation scripts for upserting the data.
+    and writes the data as RDF N-Quads for `dgraph live` / `dgraph bulk`.
 
     Args:
         input_json_path (str): Path to the input JSON file containing the KG.
@@ -100,6 +141,10 @@ type Country {
     publishes_from
 }
 
+# Blank node label of every node (the KG id, escaped where needed), used by
+# `dgraph live --upsertPredicate nodeId` to find existing nodes on reload
+nodeId: string @index(exact) @upsert .
+
 # Define Relationships (predicates connecting types)
 # Note: Dgraph relationships are typed, so we define the type of the relationship itself
 has_author: [Author] @reverse
@@ -117,94 +162,57 @@ cites_paper: [Paper] @reverse
         f.write(schema_content)
     print(f"Dgraph schema saved to {schema_file_path}")
 
-    # --- 2. Generate Dgraph Mutations (Data) ---
-    mutations_file_path = os.path.join(output_dir, "dgraph_mutations.graphql")
+    # --- 2. Generate Dgraph RDF N-Quads (Data) ---
+    # A single N-Quad file can be loaded in one pass by `dgraph live` or
+    # `dgraph bulk`. Each node's blank node label is blank_node_label(id), so
+    # every mention of a node resolves to the same Dgraph node.
+    #
+    # The same label is written as the node's nodeId. `dgraph live
+    # --upsertPredicate nodeId` looks every blank node up by eq(nodeId, label)
+    # before creating it and stores the label there, so a second load of this
+    # file finds the nodes from the first one and updates them instead of
+    # creating duplicates. The two values must stay identical for that to hold.
+    mutations_file_path = os.path.join(output_dir, "dgraph_data.rdf")
     
     unique_nodes = kg_data.get('nodes', [])
     relationships = kg_data.get('relationships', [])
 
-    # Group nodes by type for efficient lookup
-    nodes_by_type = {}
-    for node in unique_nodes:
-        node_type = node.get('type')
-        if node_type not in nodes_by_type:
-            nodes_by_type[node_type] = {}
-        nodes_by_type[node_type][node['id']] = node
+    # json.dumps escapes quotes, backslashes, newlines and control characters
+    # in C, producing a valid N-Quad literal including the surrounding quotes
+    quote = functools.partial(json.dumps, ensure_ascii=False)
 
-    with open(mutations_file_path, 'w', encoding='utf-8') as f:
-        # Use a list to store all mutation blocks
-        mutation_blocks = []
+    # Write each quad as it is produced instead of holding the whole output in memory
+    with open(mutations_file_path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+        write = f.write
 
-        # Mutation 1: Create or find all nodes (upsert)
+        # Nodes: type, external id and one quad per property. There are only a
+        # handful of node types, so their quoted literals are computed once.
+        type_literals = {}
         for node in unique_nodes:
-            node_type = node.get('type')
             node_id = node.get('id')
-            
-            # Upsert block
-            mutation = f"""
-{{
-    # Find existing node or create a new one
-    q(func: eq(nodeId, "{node_id}")) {{
-        v as uid
-    }}
-}}
-mutation {{
-    set {{
-        # Upsert logic
-        uid(v) <dgraph.type> "{node_type}" .
-        <_:newnode> <nodeId> "{node_id}" .
-        <_:newnode> <dgraph.type> "{node_type}" .
-"""
-            # Add properties to the mutation block
-            for key, value in node.items():
-                if key not in ['id', 'type', 'nodeId'] and value:
-                    # Escape double quotes in string values
-                    safe_value = str(value).replace('"', '\\"')
-                    mutation += f'        <_:newnode> <{key}> "{safe_value}" . \n'
-            
-            # Close the upsert block
-            mutation += """
-    }}
-}
-"""
-            mutation_blocks.append(mutation)
+            node_type = node.get('type')
+            type_literal = type_literals.get(node_type)
+            if type_literal is None:
+                type_literal = type_literals[node_type] = quote(str(node_type))
+            subject = blank_node_label(node_id)
+            write(NODE_HEADER_QUADS % (subject, type_literal, subject, subject))
+            write(''.join([PROPERTY_QUAD % (subject, key, quote(str(value)))
+                           for key, value in node.items() if value and key not in NODE_META_KEYS]))
         
-        # Mutation 2: Create all relationships (upsert)
+        # Relationships: one edge quad each, with citation text as a facet
         for rel in relationships:
-            rel_type = rel['type']
-            start_node_id = rel['startNode']
-            end_node_id = rel['endNode']
-
-            # Find UIDs for both start and end nodes
-            rel_mutation = f"""
-{{
-    q_start(func: eq(nodeId, "{start_node_id}")) {{
-        start_uid as uid
-    }}
-    q_end(func: eq(nodeId, "{end_node_id}")) {{
-        end_uid as uid
-    }}
-}}
-mutation {{
-    set {{
-        # Connect nodes with a relationship
-        uid(start_uid) <{rel_type}> uid(end_uid) .
-"""
-            # Add relationship properties if they exist
-            if 'citation_text' in rel:
-                safe_citation_text = rel['citation_text'].replace('"', '\\"')
-                rel_mutation += f'        uid(start_uid) <citation_text> "{safe_citation_text}" . \n'
-            
-            rel_mutation += """
-    }}
-}
-"""
-            mutation_blocks.append(rel_mutation)
-
-        f.write("\n\n".join(mutation_blocks))
+            start = blank_node_label(rel['startNode'])
+            end = blank_node_label(rel['endNode'])
+            citation_text = rel.get('citation_text')
+            # A missing citation (null in the KG) would be an invalid facet value
+            if citation_text:
+                write(CITATION_EDGE_QUAD % (start, rel['type'], end, quote(str(citation_text))))
+            else:
+                write(EDGE_QUAD % (start, rel['type'], end))
         
-    print(f"Dgraph mutations saved to {mutations_file_path}")
-    print("\nScript completed. You can now use these files to load data into Dgraph.")
+    print(f"Dgraph N-Quads saved to {mutations_file_path}")
+    print("\nScript completed. Load the data with e.g.:")
+    print(f"  dgraph live -f {mutations_file_path} --upsertPredicate nodeId")
 
 if __name__ == "__main__":
     # Ensure the script is run with the correct path to the JSON file
@@ -1,50 +1,94 @@
 # -*- coding: utf-8 -*-
 """
-This utility script connects to the NCBI FTP server and counts the 
-baseline files for a given year.
+This utility script counts the PubMed baseline files for a given year on the
+NCBI server, using the HTTPS directory index with an FTP listing as fallback.
 """
 
 import ftplib
+import re
+import requests
 
-def count_remote_files(year):
+BASELINE_URL = "https://ftp.ncbi.nlm.nih.gov/pubmed/baseline/"
+FTP_HOST = "ftp.ncbi.nlm.nih.gov"
+FTP_DIR = "/pubmed/baseline/"
+
+def count_remote_files_https(year, session=None):
+    """
+    Counts the .xml.gz files for a given year from the HTTPS directory index.
+
+    Args:
+        year (int): The baseline year to count files for.
+        session (requests.Session, optional): Session to reuse, so the
+            connection can be shared with the downloader.
+
+    Returns:
+        int: The number of files found.
+    """
+    response = (session or requests).get(BASELINE_URL, timeout=30)
+    response.raise_for_status()
+    pattern = re.compile(rf'href="(pubmed{str(year)[-2:]}n\d+\.xml\.gz)"')
+    return len(set(pattern.findall(response.text)))
+
+def count_remote_files_ftp(year):
     """
     Connects to the NCBI FTP server and counts the .xml.gz files for a given year.
 
     Args:
         year (int): The baseline year to count files for.
-    
+
     Returns:
-        int: The number of files found, or None if an error occurs.
+        int: The number of files found.
     """
-    FTP_HOST = "ftp.ncbi.nlm.nih.gov"
-    FTP_DIR = "/pubmed/baseline/"
-    
     year_prefix = f"pubmed{str(year)[-2:]}n"
 
-    print(f"Connecting to {FTP_HOST} to count remote files for year {year}...")
+    with ftplib.FTP(FTP_HOST, timeout=30) as ftp:
+        ftp.login()  # Anonymous login
+        ftp.cwd(FTP_DIR)
 
+        # Get a simple list of filenames
+        all_files = ftp.nlst()
+        
+        file_count = 0
+        for filename in all_files:
+            if filename.startswith(year_prefix) and filename.endswith('.xml.gz'):
+                file_count += 1
+        return file_count
+
+def count_remote_files(year, session=None):
+    """
+    Counts the baseline .xml.gz files for a given year on the NCBI server.
+    Reads the HTTPS directory index (a single GET) and falls back to an FTP
+    listing if that fails or finds no files.
+
+    Args:
+        year (int): The baseline year to count files for.
+        session (requests.Session, optional): Session to reuse for the HTTPS request.
+    
+    Returns:
+        int: The number of files found, or None if an error occurs.
+    """
+    print(f"Counting remote files for year {year} at {BASELINE_URL}...")
+
+    file_count = 0
     try:
-        with ftplib.FTP(FTP_HOST, timeout=30) as ftp:
-            ftp.login()  # Anonymous login
-            ftp.cwd(FTP_DIR)
-
-            # Get a simple list of filenames
-            all_files = ftp.nlst()
-            
-            file_count = 0
-            for filename in all_files:
-                if filename.startswith(year_prefix) and filename.endswith('.xml.gz'):
-                    file_count += 1
-            
-            print(f"Found {file_count} remote files for year {year}.")
-            return file_count
-
-    except ftplib.all_errors as e:
-        print(f"\nAn FTP error occurred while counting files: {e}")
-        return None
-    except Exception as e:
-        print(f"\nAn unexpected error occurred while counting files: {e}")
-        return None
+        file_count = count_remote_files_https(year, session)
+    except requests.exceptions.RequestException as e:
+        print(f"\nCould not read the HTTPS index: {e}")
+
+    # Also covers an index that loads but no longer matches the expected layout
+    if not file_count:
+        print(f"No files found via HTTPS; falling back to FTP on {FTP_HOST}...")
+        try:
+            file_count = count_remote_files_ftp(year)
+        except ftplib.all_errors as e:
+            print(f"\nAn FTP error occurred while counting files: {e}")
+            return None
+        except Exception as e:
+            print(f"\nAn unexpected error occurred while counting files: {e}")
+            return None
+
+    print(f"Found {file_count} remote files for year {year}.")
+    return file_count
 
 # This part is for direct testing of this script.
 if __name__ == "__main__":
@@ -17,13 +17,35 @@ class SentenceEmbedder:
         self.model.eval() # Set the model to evaluation mode
         self.max_seq_length = max_seq_length
 
-    def encode(self, sentences):
+    def _embed_texts(self, texts, batch_size):
+        """
+        Runs the model over texts in padded batches and returns their [CLS] embeddings.
+
+        Args:
+            texts (list): Strings that each fit within max_seq_length tokens.
+            batch_size (int): The number of texts per forward pass.
+
+        Returns:
+            torch.Tensor: Shape (len(texts), embedding dimension).
+        """
+        batch_embeddings = []
+        for i in range(0, len(texts), batch_size):
+            inputs = self.tokenizer(texts[i : i + batch_size], padding=True, truncation=True, return_tensors="pt", max_length=self.max_seq_length)
+            with torch.inference_mode():
+                outputs = self.model(**inputs)
+            # The embedding for the [CLS] token is the first vector in each sequence;
+            # padding is masked out, so it matches encoding each text on its own
+            batch_embeddings.append(outputs.last_hidden_state[:, 0, :])
+        return torch.cat(batch_embeddings)
+
+    def encode(self, sentences, batch_size=32):
         """
         Encodes a list of sentences (or a single sentence) into embeddings using the [CLS] token representation.
         Handles long texts by splitting into chunks and averaging embeddings.
 
         Args:
             sentences (list or str): A list of strings or a single string (sentence/text).
+            batch_size (int): The number of sentences/chunks per forward pass.
 
         Returns:
             torch.Tensor: A tensor containing the [CLS] token embeddings for each sentence/text.
@@ -32,46 +54,35 @@ class SentenceEmbedder:
         if not isinstance(sentences, list):
             sentences = [sentences] # Handle single sentence input
 
-        all_embeddings = []
-        for sentence in sentences:
-            # Tokenize the entire sentence first
+        chunk_size = self.max_seq_length - 2 # Account for [CLS] and [SEP]
+        overlap = chunk_size // 2 # Example overlap
+
+        # Split the inputs into texts that fit in one pass and overlapping chunks of
+        # the long ones, so each group can be run through the model in batches
+        short_indices, short_texts = [], []
+        chunk_spans, chunk_texts = [], []
+        for idx, sentence in enumerate(sentences):
             tokens = self.tokenizer.tokenize(sentence)
             token_length = len(tokens)
 
-            if token_length <= self.max_seq_length - 2: # Account for [CLS] and [SEP]
-                # Encode directly if within max sequence length
-                inputs = self.tokenizer(sentence, padding=True, truncation=True, return_tensors="pt", max_length=self.max_seq_length)
-                with torch.no_grad():
-                    outputs = self.model(**inputs, output_hidden_states=True)
-                # The last hidden state is in outputs.hidden_states[-1]
-                # The embedding for the [CLS] token is the first vector in the sequence
-                cls_embedding = outputs.hidden_states[-1][:, 0, :].squeeze(0) # Remove batch dim for single sentence
-                all_embeddings.append(cls_embedding)
+            if token_length <= chunk_size:
+                short_indices.append(idx)
+                short_texts.append(sentence)
             else:
-                # Handle long text by splitting into overlapping chunks
-                chunk_size = self.max_seq_length - 2 # Account for [CLS] and [SEP]
-                overlap = chunk_size // 2 # Example overlap
-
-                chunk_embeddings = []
-                # Iterate through tokens with overlap
+                start = len(chunk_texts)
                 for i in range(0, token_length, chunk_size - overlap):
-                    chunk_tokens = tokens[i : i + chunk_size]
-
-                    # Convert chunk tokens back to a string and tokenize with padding/truncation
-                    # Ensure each chunk input is exactly max_seq_length after adding special tokens
-                    chunk_text = self.tokenizer.convert_tokens_to_string(chunk_tokens)
-                    inputs = self.tokenizer(chunk_text, padding='max_length', truncation=True, return_tensors="pt", max_length=self.max_seq_length)
-
-                    with torch.no_grad():
-                        outputs = self.model(**inputs, output_hidden_states=True)
-
-                    # Get the [CLS] token embedding for the chunk
-                    cls_embedding = outputs.hidden_states[-1][:, 0, :].squeeze(0) # Remove batch dim for single chunk
-                    chunk_embeddings.append(cls_embedding)
-
-                # Average the chunk embeddings
-                averaged_embedding = torch.mean(torch.stack(chunk_embeddings), dim=0)
-                all_embeddings.append(averaged_embedding)
+                    chunk_texts.append(self.tokenizer.convert_tokens_to_string(tokens[i : i + chunk_size]))
+                chunk_spans.append((idx, start, len(chunk_texts)))
+
+        all_embeddings = [None] * len(sentences)
+        if short_texts:
+            for idx, embedding in zip(short_indices, self._embed_texts(short_texts, batch_size)):
+                all_embeddings[idx] = embedding
+        if chunk_texts:
+            chunk_embeddings = self._embed_texts(chunk_texts, batch_size)
+            # Average the chunk embeddings of each long text
+            for idx, start, end in chunk_spans:
+                all_embeddings[idx] = chunk_embeddings[start:end].mean(dim=0)
 
         return torch.stack(all_embeddings) # Stack all sentence/text embeddings
 